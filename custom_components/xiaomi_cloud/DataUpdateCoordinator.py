@@ -6,16 +6,15 @@ import logging
 import re
 import base64
 import hashlib
-import math
+import functools
 from urllib import parse
 import aiohttp
-import async_timeout
 from aiohttp.client_exceptions import ClientConnectorError
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.core_config import Config
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.components.device_tracker import (
     ATTR_BATTERY,
@@ -25,13 +24,57 @@ from homeassistant.util.dt import as_local, now, utcnow, parse_datetime
 
 from .const import (
     DOMAIN,
+    DEFAULT_FETCH_CONCURRENCY,
+    DEFAULT_ADAPTIVE_FIX_WAIT,
+    DEFAULT_FIX_WAIT_TIMEOUT,
+    DEFAULT_FIX_FRESHNESS,
+    DEFAULT_XIAOMI_RATE_LIMIT,
+    DEFAULT_XIAOMI_BURST,
 )
+from .models import DeviceSnapshot, LocationFix, diff_snapshots, format_timestamp
+from .profiles import active_interval, seconds_until_boundary
+from .ratelimit import PriorityTokenBucket
+from .resilience import LANE_COMMAND, CircuitOpenError, XiaomiRequester
+from .scheduler import PollScheduler
 _LOGGER = logging.getLogger(__name__)
 
+# 设备命令的执行结果
+COMMAND_RESULT_OK = "ok"
+COMMAND_RESULT_TIMEOUT = "timeout"
+COMMAND_RESULT_AUTH = "auth_failed"
+COMMAND_RESULT_ERROR = "error"
+
+# 无需刷新位置、直接执行的服务命令
+COMMAND_SERVICES = ("noise", "lost", "clipboard")
+
+# 自适应定位等待的轮询间隔（秒）
+ADAPTIVE_POLL_INITIAL_DELAY = 2
+ADAPTIVE_POLL_BACKOFF = 1.5
+ADAPTIVE_POLL_MAX_DELAY = 8
+
+# 查找设备相关接口所在的主机，熔断时直接使用缓存数据
+FIND_HOST = "i.mi.com"
+
+# 限流令牌桶中只留给用户命令的令牌数
+XIAOMI_COMMAND_RESERVE = 1
+
+# 登录失败后的冷却时间（秒），连续失败时翻倍
+LOGIN_COOLDOWN_BASE = 60
+LOGIN_COOLDOWN_MAX = 1800
+
+
+class LoginExpiredError(Exception):
+    """小米云登录失效(401或错误码6)."""
+
+
 class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
     """小米云服务数据更新协调器."""
     def __init__(self, hass, user, password, scan_interval, coordinate_type, gaode_api_key=None, 
-                 low_battery_polling=False, low_battery_threshold=40, low_battery_interval=10):
+                 low_battery_polling=False, low_battery_threshold=40, low_battery_interval=10,
+                 fetch_concurrency=DEFAULT_FETCH_CONCURRENCY,
+                 adaptive_fix_wait=DEFAULT_ADAPTIVE_FIX_WAIT, fix_wait_timeout=DEFAULT_FIX_WAIT_TIMEOUT,
+                 fix_freshness=DEFAULT_FIX_FRESHNESS, polling_profiles=None,
+                 rate_limit=DEFAULT_XIAOMI_RATE_LIMIT, burst=DEFAULT_XIAOMI_BURST, session_store=None):
         """初始化协调器."""
         self._username = user
         self._password = password
@@ -47,16 +90,38 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
         self._low_battery_polling = low_battery_polling
         self._low_battery_threshold = int(low_battery_threshold)  # 低电量阈值
         self._low_battery_interval = int(low_battery_interval)  # 低电量时更新间隔
-        self._normal_scan_interval = int(scan_interval)  # 保存正常更新间隔
-        self._is_low_battery_mode = False  # 是否处于低电量模式
+        self._fetch_concurrency = int(fetch_concurrency)  # 设备请求并发数
+        self._adaptive_fix_wait = adaptive_fix_wait  # 是否轮询等待新定位
+        self._fix_wait_timeout = int(fix_wait_timeout)  # 等待新定位的最长时间（秒）
+        self._fix_freshness = int(fix_freshness)  # 云端定位在该秒数内时不发送查找命令，0为总是发送
+        self._polling_profiles = polling_profiles or []  # 按时段切换基础间隔的规则
+        self._active_interval = active_interval(self._polling_profiles, now(), self._scan_interval)
+        self._unsub_profile_boundary = None
         
-        self.service_data = None
         self.userId = None
         self.login_result = False
-        self.service = None
         self._last_position_update = {}  # 记录每个设备上次位置更新时间
         self._Service_Token = None  # 确保_Service_Token被初始化
-        self._last_devices_data = []  # 存储上次获取的设备数据，用于恢复状态
+        self._last_devices_data = {}  # 存储上次获取的设备数据 {imei: DeviceSnapshot}，用于恢复状态
+        self._session_store = session_store  # 登录会话持久化存储
+        self._session_restored = False
+        self._session_restore_lock = asyncio.Lock()
+        self._session = None  # 本账号独立的HTTP会话，首次使用时创建
+        # 带重试和熔断的请求层，本账号所有请求共享一个按优先级排队的令牌桶
+        self.requester = XiaomiRequester(limiter=PriorityTokenBucket(
+            float(rate_limit), int(burst), XIAOMI_COMMAND_RESERVE))
+        self._login_task = None  # 正在进行的登录任务，供并发调用方共享
+        self._login_failures = 0  # 连续登录失败次数
+        self._login_cooldown_until = 0  # 登录冷却截止时间（事件循环时间）
+        self._published_data = {}  # 上次通知监听者时的设备数据
+        # 按设备调度轮询，间隔单位为秒
+        self._scheduler = PollScheduler(
+            self._active_interval * 60,
+            self._low_battery_threshold if self._low_battery_polling else None,
+            self._low_battery_interval * 60,
+        )
+        self.changes = {}  # 本次通知中各设备发生变化的字段 {imei: frozenset}
+        self._force_full_refresh = False  # 下次更新轮询所有设备，不论是否到期
 
         # 确保使用正确的更新间隔
         _LOGGER.info("初始化小米云服务 - 位置更新间隔设置为 %s 分钟", self._scan_interval)
@@ -71,11 +136,14 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
                        self._low_battery_threshold, self._low_battery_interval)
         
         # 设置更新间隔
-        update_interval = datetime.timedelta(minutes=self._scan_interval)
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
+        update_interval = datetime.timedelta(minutes=self._active_interval)
+        # 数据与上次完全相同时不通知监听者
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval,
+                         always_update=False)
         
         # 确保初始化后立即调度一次以确保正确应用更新间隔
         hass.async_create_task(self._schedule_initial_refresh())
+        self._schedule_profile_boundary()
 
     async def _get_sign(self, session):
         """获取签名信息."""
@@ -83,8 +151,7 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
         pattern = re.compile(r'_sign=(.*?)&')
         _LOGGER.debug("开始获取签名")
         try:
-            with async_timeout.timeout(15):
-                r = await session.get(url, headers=self._headers)
+            r = await self.requester.request(session, "GET", url, "sign", headers=self._headers)
             self._cookies['pass_trace'] = r.history[0].headers.getall('Set-Cookie')[2].split(";")[0].split("=")[1]
             sign_value = parse.unquote(pattern.findall(r.history[0].headers.getall('Location')[0])[0])
             _LOGGER.debug("获取到签名: %s", sign_value)
@@ -120,8 +187,9 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
                                           '; ick={}'.format(self._cookies['ick'])
             
             _LOGGER.debug("执行服务登录认证")
-            with async_timeout.timeout(15):
-                r = await session.post(url, headers=self._headers, data=auth_post_data, cookies=self._cookies)
+            r = await self.requester.request(
+                session, "POST", url, "login",
+                headers=self._headers, data=auth_post_data, cookies=self._cookies)
             
             if not r.cookies.get('passToken'):
                 _LOGGER.warning("登录认证失败，未获取到passToken")
@@ -148,8 +216,7 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
                   "&clientSign=" + parse.quote(base64_serviceToken.decode())
             
             _LOGGER.debug("开始登录小米AI服务")
-            with async_timeout.timeout(15):
-                r = await session.get(url, headers=loginmiai_header)
+            r = await self.requester.request(session, "GET", url, "service_token", headers=loginmiai_header)
             
             if r.status == 200 and r.cookies.get('serviceToken') and r.cookies.get('userId'):
                 self._Service_Token = r.cookies.get('serviceToken').value
@@ -171,8 +238,7 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
             self.userId, self._Service_Token)}
         try:
             _LOGGER.debug("开始获取设备信息")
-            with async_timeout.timeout(15):
-                r = await session.get(url, headers=get_device_list_header)
+            r = await self.requester.request(session, "GET", url, "device_list", headers=get_device_list_header)
             
             # 检查HTTP状态码
             if r.status == 401:
@@ -201,195 +267,310 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
                 return True
             else:
                 _LOGGER.warning("获取设备信息失败，HTTP状态码: %s", r.status)
-                self.login_result = False
+                # 服务端错误已由请求层重试，不代表登录失效
+                if r.status < 500:
+                    self.login_result = False
                 return False
         except Exception as e:
             _LOGGER.warning("获取设备信息时出错: %s", str(e))
             return False
     
-    async def _send_find_device_command(self, session:aiohttp.ClientSession):
-        """发送查找设备命令，触发手机定位."""
+    @callback
+    def async_update_listeners(self):
+        """计算各设备相对上次通知的变化，再通知监听者."""
+        self.changes = diff_snapshots(self._published_data, self.data)
+        self._published_data = self.data
+        super().async_update_listeners()
+
+    def device_changed(self, imei, fields=None):
+        """本次更新中设备是否发生变化，fields不为空时只检查这些字段."""
+        changed = self.changes.get(imei)
+        if not changed:
+            return False
+        return fields is None or not changed.isdisjoint(fields)
+
+    def _get_session(self):
+        """返回本账号独立的HTTP会话.
+
+        使用独立的cookie jar，登录时清空cookie不会影响其他集成或其他账号；
+        会话由Home Assistant创建，关闭Home Assistant时自动释放.
+        """
+        if self._session is None or self._session.closed:
+            self._session = async_create_clientsession(self.hass, cookie_jar=aiohttp.CookieJar())
+        return self._session
+
+    async def async_close(self):
+        """卸载配置入口时取消时段定时器并关闭本账号的HTTP会话."""
+        if self._unsub_profile_boundary:
+            self._unsub_profile_boundary()
+            self._unsub_profile_boundary = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _async_login(self, session, stale_token=None):
+        """登录小米云，同一账号同一时间只执行一次登录.
+
+        并发调用方共享正在进行的登录结果；登录失败后进入冷却期，
+        冷却期内直接返回False. stale_token为调用方发现失效的serviceToken，
+        如果其他调用方已经刷新了token则无需再次登录.
+        """
+        if self._login_task is not None and not self._login_task.done():
+            _LOGGER.debug("登录正在进行中，等待其结果")
+            return await asyncio.shield(self._login_task)
+
+        if stale_token is not None and self.login_result and self._Service_Token != stale_token:
+            _LOGGER.debug("登录凭据已被刷新，无需重新登录")
+            return True
+
+        remaining = self._login_cooldown_until - asyncio.get_running_loop().time()
+        if remaining > 0:
+            _LOGGER.warning("上次登录失败，%d秒内不再尝试登录", int(remaining))
+            return False
+
+        self._login_task = asyncio.ensure_future(self._do_login(session))
+        return await asyncio.shield(self._login_task)
+
+    async def _do_login(self, session):
+        """按顺序执行完整登录流程."""
+        _LOGGER.info("开始执行登录流程")
+        self.login_result = False
+        session.cookie_jar.clear()
+
+        success = False
+        if not await self._get_sign(session):
+            _LOGGER.warning("获取sign失败")
+        elif not await self._serviceLoginAuth2(session):
+            _LOGGER.warning('登录验证失败')
+        elif self._serviceLoginAuth2_json.get('code', -1) != 0:
+            _LOGGER.warning('登录验证返回错误码: %s', self._serviceLoginAuth2_json.get('code', -1))
+        elif not await self._login_miai(session):
+            _LOGGER.warning('登录小米云失败')
+        elif not await self._get_device_info(session):
+            _LOGGER.warning('获取设备信息失败')
+        else:
+            success = True
+
+        if not success:
+            self._login_failures += 1
+            cooldown = min(LOGIN_COOLDOWN_BASE * 2 ** (self._login_failures - 1), LOGIN_COOLDOWN_MAX)
+            self._login_cooldown_until = asyncio.get_running_loop().time() + cooldown
+            _LOGGER.warning("登录失败（连续%d次），%d秒后才会再次尝试", self._login_failures, cooldown)
+            return False
+
+        _LOGGER.info("登录成功，获取到%d个设备信息", len(self._device_info))
+        self._login_failures = 0
+        self._login_cooldown_until = 0
+        self.login_result = True
+        await self._async_save_session()
+        return True
+
+    async def _async_restore_session(self):
+        """从存储中恢复上次的登录会话，乐观地视为已登录."""
+        async with self._session_restore_lock:
+            if self._session_restored:
+                return
+            self._session_restored = True
+            if self._session_store is None:
+                return
+            try:
+                stored = await self._session_store.async_load()
+            except Exception as e:
+                _LOGGER.warning("读取保存的小米云会话时出错: %s", str(e))
+                return
+            if not stored or not stored.get("service_token") or not stored.get("user_id"):
+                _LOGGER.debug("没有可用的已保存会话")
+                return
+
+            self._Service_Token = stored["service_token"]
+            self.userId = stored["user_id"]
+            self._cookies = stored.get("cookies", {})
+            self._device_info = stored.get("device_info", [])
+            self.login_result = True
+            _LOGGER.info("已恢复保存的小米云会话，跳过登录，设备数: %d", len(self._device_info))
+
+    async def _async_save_session(self):
+        """登录成功后保存会话，供重启后复用."""
+        if self._session_store is None or not self._Service_Token:
+            return
+        try:
+            await self._session_store.async_save({
+                "service_token": self._Service_Token,
+                "user_id": self.userId,
+                "cookies": self._cookies,
+                "device_info": self._device_info,
+            })
+            _LOGGER.debug("小米云会话已保存")
+        except Exception as e:
+            _LOGGER.warning("保存小米云会话时出错: %s", str(e))
+
+    async def _send_find_to_device(self, session:aiohttp.ClientSession, vin, lane=None):
+        """向单个设备发送查找命令，返回该设备的执行结果.
+
+        lane为限流优先级，用户触发的定位使用LANE_COMMAND.
+        """
+        imei = vin.get("imei")
+        model = vin.get("model", "未知设备")
+
+        url = 'https://i.mi.com/find/device/{}/location'.format(imei)
+        data = {'userId': self.userId, 'imei': imei,
+                'auto': 'false', 'channel': 'web', 'serviceToken': self._Service_Token}
+        _LOGGER.info(f"向设备[{model}]发送查找命令，触发定位...")
+        result = await self._post_command(session, url, data, f"查找设备[{model}]", "find", lane)
+        if result == COMMAND_RESULT_OK:
+            _LOGGER.info(f"成功发送查找命令到设备[{model}]")
+        return result
+
+    async def _send_find_device_command(self, session:aiohttp.ClientSession, imeis=None):
+        """并发发送查找设备命令，触发手机定位.
+
+        imeis不为None时只向其中的设备发送.
+        返回 {imei: 结果} 映射，结果为 COMMAND_RESULT_* 之一；
+        仅当有设备返回登录失效时才标记需要重新登录.
+        """
         if not self._device_info:
             _LOGGER.warning("没有设备信息，无法发送查找命令")
-            return False
+            return {}
             
-        flag = True
         device_count = len(self._device_info)
         _LOGGER.info("开始向%d个设备发送查找命令", device_count)
-        
+
+        targets = []
         for vin in self._device_info:
-            imei = vin.get("imei")
-            model = vin.get("model", "未知设备")
-            
-            if not imei:
-                _LOGGER.warning(f"设备[{model}]没有IMEI，跳过")
+            if not vin.get("imei"):
+                _LOGGER.warning(f"设备[{vin.get('model', '未知设备')}]没有IMEI，跳过")
                 continue
-                
-            url = 'https://i.mi.com/find/device/{}/location'.format(imei)
-            _send_find_device_command_header = {
-                'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
-            data = {'userId': self.userId, 'imei': imei,
-                    'auto': 'false', 'channel': 'web', 'serviceToken': self._Service_Token}
-            try:
-                _LOGGER.info(f"向设备[{model}]发送查找命令，触发定位...")
-                with async_timeout.timeout(15):
-                    r = await session.post(url, headers=_send_find_device_command_header, data=data)
-                
-                if r.status != 200:
-                    _LOGGER.warning(f"查找设备[{model}]失败，HTTP状态码: {r.status}")
-                    if r.status == 401:
-                        self.login_result = False
-                        flag = False
-                        break
-                    continue
-                
-                try:
-                    response_json = await r.json()
-                    
-                    # 检查返回状态和状态码，处理登录失效的情况
-                    if isinstance(response_json, dict) and response_json.get('code') in [401, 6]:
-                        _LOGGER.warning(f"查找设备[{model}]时登录失效(401)，需要重新登录")
-                        self.login_result = False
-                        flag = False
-                        break
-                    _LOGGER.info(f"成功发送查找命令到设备[{model}]")
-                except Exception as e:
-                    _LOGGER.warning(f"解析查找设备[{model}]响应时出错: {str(e)}")
-            except Exception as e:
-                _LOGGER.warning(f"向设备[{model}]发送查找命令时出错: {str(e)}")
-                self.login_result = False
-                flag = False
-        
-        _LOGGER.info("发送查找命令完成，结果: %s", "成功" if flag else "失败")
-        return flag
+            if imeis is not None and vin["imei"] not in imeis:
+                continue
+            targets.append(vin)
+
+        outcomes = await self._gather_limited(
+            [functools.partial(self._send_find_to_device, session, vin) for vin in targets])
+        results = {vin["imei"]: outcome for vin, outcome in zip(targets, outcomes)}
+
+        if COMMAND_RESULT_AUTH in results.values():
+            self.login_result = False
+
+        _LOGGER.info("发送查找命令完成，结果: %s", results)
+        return results
     
-    async def _send_noise_command(self, session:aiohttp.ClientSession):
-        """发送播放声音命令."""
-        if not self.service_data or 'imei' not in self.service_data:
-            _LOGGER.warning("没有指定设备IMEI，无法发送声音命令")
-            return False
-            
-        flag = True
-        imei = self.service_data['imei']  
-        url = 'https://i.mi.com/find/device/{}/noise'.format(imei)
-        _send_noise_command_header = {
+    async def _post_command(self, session:aiohttp.ClientSession, url, data, name, endpoint="command", lane=None):
+        """POST一条设备命令，返回COMMAND_RESULT_*之一."""
+        header = {
             'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
-        data = {'userId': self.userId, 'imei': imei,
-                'auto': 'false', 'channel': 'web', 'serviceToken': self._Service_Token}
         try:
-            _LOGGER.info("向设备[%s]发送播放声音命令", imei)
-            with async_timeout.timeout(15):
-                r = await session.post(url, headers=_send_noise_command_header, data=data)
-            
+            r = await self.requester.request(session, "POST", url, endpoint, lane, headers=header, data=data)
+
             if r.status != 200:
-                _LOGGER.warning("发送声音命令失败，HTTP状态码: %s", r.status)
-                self.login_result = False
-                return False
-                
-            response_json = await r.json()
-            _LOGGER.debug("声音命令响应: %s", response_json)
-            
+                _LOGGER.warning("发送%s命令失败，HTTP状态码: %s", name, r.status)
+                if r.status == 401:
+                    self.login_result = False
+                    return COMMAND_RESULT_AUTH
+                return COMMAND_RESULT_ERROR
+
+            try:
+                response_json = await r.json(content_type=None)
+            except ValueError as e:
+                # HTTP 200说明命令已被接受，响应体无法解析时仍视为成功
+                _LOGGER.warning("解析%s命令响应时出错: %s", name, str(e))
+                return COMMAND_RESULT_OK
+            _LOGGER.debug("%s命令响应: %s", name, response_json)
+
             # 检查返回状态和状态码，处理登录失效的情况
             if isinstance(response_json, dict) and response_json.get('code') in [401, 6]:
-                _LOGGER.warning("发送声音指令时登录失效(401)，需要重新登录")
+                _LOGGER.warning("发送%s指令时登录失效(401)，需要重新登录", name)
                 self.login_result = False
-                flag = False
-            else:
-                _LOGGER.info("成功发送声音命令到设备[%s]", imei)
-                self.service = None
-                self.service_data = None
-            
-            return flag
+                return COMMAND_RESULT_AUTH
+            return COMMAND_RESULT_OK
+        except asyncio.TimeoutError:
+            _LOGGER.warning("发送%s命令超时", name)
+            return COMMAND_RESULT_TIMEOUT
         except Exception as e:
-            _LOGGER.warning("发送声音命令时出错: %s", str(e))
-            self.login_result = False
-            return False
+            _LOGGER.warning("发送%s命令时出错: %s", name, str(e))
+            return COMMAND_RESULT_ERROR
+
+    async def _send_noise_command(self, session:aiohttp.ClientSession, service_data):
+        """发送播放声音命令."""
+        if not service_data or 'imei' not in service_data:
+            _LOGGER.warning("没有指定设备IMEI，无法发送声音命令")
+            return COMMAND_RESULT_ERROR
+            
+        imei = service_data['imei']  
+        url = 'https://i.mi.com/find/device/{}/noise'.format(imei)
+        data = {'userId': self.userId, 'imei': imei,
+                'auto': 'false', 'channel': 'web', 'serviceToken': self._Service_Token}
+        _LOGGER.info("向设备[%s]发送播放声音命令", imei)
+        result = await self._post_command(session, url, data, "声音")
+        if result == COMMAND_RESULT_OK:
+            _LOGGER.info("成功发送声音命令到设备[%s]", imei)
+        return result
 
-    async def _send_lost_command(self, session:aiohttp.ClientSession):
+    async def _send_lost_command(self, session:aiohttp.ClientSession, service_data):
         """发送设备丢失命令."""
-        if not self.service_data or 'imei' not in self.service_data:
+        if not service_data or 'imei' not in service_data:
             _LOGGER.warning("没有指定设备IMEI，无法发送丢失命令")
-            return False
+            return COMMAND_RESULT_ERROR
         
-        flag = True
-        imei = self.service_data['imei']  
-        content = self.service_data.get('content', "")  
-        phone = self.service_data.get('phone', "")  
+        imei = service_data['imei']  
+        content = service_data.get('content', "")  
+        phone = service_data.get('phone', "")  
         message = {"content": content, "phone": phone}
-        onlinenotify = self.service_data.get('onlinenotify', True)
+        onlinenotify = service_data.get('onlinenotify', True)
         url = 'https://i.mi.com/find/device/{}/lost'.format(imei)
-        _send_lost_command_header = {
-            'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
         data = {'userId': self.userId, 'imei': imei,
                 'deleteCard': 'false', 'channel': 'web', 'serviceToken': self._Service_Token, 
                 'onlineNotify': onlinenotify, 'message': json.dumps(message)}
-        try:
-            _LOGGER.info("向设备[%s]发送丢失命令", imei)
-            with async_timeout.timeout(15):
-                r = await session.post(url, headers=_send_lost_command_header, data=data)
-            
-            if r.status != 200:
-                _LOGGER.warning("发送丢失命令失败，HTTP状态码: %s", r.status)
-                self.login_result = False
-                return False
-                
-            response_json = await r.json()
-            _LOGGER.debug("丢失命令响应: %s", response_json)
-            
-            if isinstance(response_json, dict) and response_json.get('code') in [401, 6]:
-                _LOGGER.warning("发送丢失指令时登录失效(401)，需要重新登录")
-                self.login_result = False
-                flag = False
-            else:
-                _LOGGER.info("成功发送丢失命令到设备[%s]", imei)
-                self.service = None
-                self.service_data = None
-            
-            return flag
-        except Exception as e:
-            _LOGGER.warning("发送丢失命令时出错: %s", str(e))
-            self.login_result = False
-            return False
+        _LOGGER.info("向设备[%s]发送丢失命令", imei)
+        result = await self._post_command(session, url, data, "丢失")
+        if result == COMMAND_RESULT_OK:
+            _LOGGER.info("成功发送丢失命令到设备[%s]", imei)
+        return result
 
-    async def _send_clipboard_command(self, session:aiohttp.ClientSession):
+    async def _send_clipboard_command(self, session:aiohttp.ClientSession, service_data):
         """发送剪贴板命令."""
-        if not self.service_data or 'text' not in self.service_data:
+        if not service_data or 'text' not in service_data:
             _LOGGER.warning("没有指定文本内容，无法发送剪贴板命令")
-            return False
+            return COMMAND_RESULT_ERROR
             
-        flag = True
-        text = self.service_data['text']  
+        text = service_data['text']  
         url = 'https://i.mi.com/clipboard/lite/text'
-        _send_clipboard_command_header = {
-            'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
         data = {'text': text, 'serviceToken': self._Service_Token}
-        try:
-            _LOGGER.info("发送剪贴板命令，文本内容长度: %d", len(text))
-            with async_timeout.timeout(15):
-                r = await session.post(url, headers=_send_clipboard_command_header, data=data)
-            
-            if r.status != 200:
-                _LOGGER.warning("发送剪贴板命令失败，HTTP状态码: %s", r.status)
-                self.login_result = False
-                return False
-                
-            response_json = await r.json()
-            _LOGGER.debug("剪贴板命令响应: %s", response_json)
-            
-            if isinstance(response_json, dict) and response_json.get('code') in [401, 6]:
-                _LOGGER.warning("发送剪贴板指令时登录失效(401)，需要重新登录")
-                self.login_result = False
-                flag = False
-            else:
-                _LOGGER.info("成功发送剪贴板命令")
-                self.service = None
-                self.service_data = None
-            
-            return flag
-        except Exception as e:
-            _LOGGER.warning("发送剪贴板命令时出错: %s", str(e))
-            self.login_result = False
+        _LOGGER.info("发送剪贴板命令，文本内容长度: %d", len(text))
+        result = await self._post_command(session, url, data, "剪贴板")
+        if result == COMMAND_RESULT_OK:
+            _LOGGER.info("成功发送剪贴板命令")
+        return result
+
+    async def async_execute_command(self, service, service_data):
+        """立即执行noise/lost/clipboard命令，不触发位置刷新.
+
+        复用当前登录凭据，登录失效时重新登录并重试一次.
+        """
+        sender = {
+            "noise": self._send_noise_command,
+            "lost": self._send_lost_command,
+            "clipboard": self._send_clipboard_command,
+        }.get(service)
+        if sender is None:
+            _LOGGER.warning("不支持的命令: %s", service)
+            return False
+
+        session = self._get_session()
+        if not self._session_restored:
+            await self._async_restore_session()
+        if not self.login_result and not await self._async_login(session):
+            _LOGGER.warning("登录失败，无法执行命令: %s", service)
             return False
+
+        used_token = self._Service_Token
+        result = await sender(session, service_data)
+        if result == COMMAND_RESULT_AUTH:
+            _LOGGER.info("执行%s命令时登录失效，重新登录后重试", service)
+            if not await self._async_login(session, stale_token=used_token):
+                return False
+            result = await sender(session, service_data)
+
+        return result == COMMAND_RESULT_OK
   
     async def _send_command(self, data):
         """发送命令入口."""
@@ -397,146 +578,267 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER.warning("命令数据格式不正确，无法发送命令")
             return
             
-        self.service_data = data['data']
-        self.service = data['service']
-        _LOGGER.info("准备发送命令: %s", self.service)
+        _LOGGER.info("准备发送命令: %s", data['service'])
+        if data['service'] in COMMAND_SERVICES:
+            await self.async_execute_command(data['service'], data['data'])
+            return
+
+        if data['service'] == "find" and data['data'].get('imei'):
+            await self.async_locate_device(data['data']['imei'])
+            return
+
+        await self.async_refresh_all()
+
+    async def async_refresh_all(self):
+        """立即刷新所有设备，用于服务触发的刷新，不受各设备调度时间限制."""
+        self._force_full_refresh = True
         await self.async_refresh()
 
-    async def _get_device_location(self, session:aiohttp.ClientSession):
-        """获取设备位置信息."""
+    async def async_locate_device(self, imei):
+        """只定位指定IMEI的设备，并仅更新该设备的数据."""
+        session = self._get_session()
+        if not self._session_restored:
+            await self._async_restore_session()
+        if not self.login_result and not await self._async_login(session):
+            _LOGGER.warning("登录失败，无法定位设备[%s]", imei)
+            return False
+
+        vin = next((item for item in self._device_info if item.get("imei") == imei), None)
+        if vin is None:
+            _LOGGER.warning("账号下没有IMEI为[%s]的设备", imei)
+            return False
+
+        model = vin.get("model", "未知设备")
+        baseline = self._last_position_update.get(imei, 0)
+        used_token = self._Service_Token
+        result = await self._send_find_to_device(session, vin, LANE_COMMAND)
+        if result == COMMAND_RESULT_AUTH:
+            _LOGGER.info("定位设备[%s]时登录失效，重新登录后重试", model)
+            if not await self._async_login(session, stale_token=used_token):
+                return False
+            result = await self._send_find_to_device(session, vin, LANE_COMMAND)
+
+        semaphore = asyncio.Semaphore(1)
+        try:
+            if result == COMMAND_RESULT_OK:
+                deadline = asyncio.get_running_loop().time() + self._fix_wait_timeout
+                device_info = await self._poll_device_fix(
+                    session, vin, baseline, deadline, semaphore, LANE_COMMAND)
+            else:
+                device_info = await self._fetch_device_status(session, vin, LANE_COMMAND)
+        except LoginExpiredError:
+            _LOGGER.warning("获取设备[%s]位置时登录失效", model)
+            return False
+
+        if not device_info:
+            _LOGGER.warning("未能获取设备[%s]的位置数据", model)
+            return False
+
+        devices_data = dict(self.data or {})
+        devices_data[imei] = device_info
+
+        _LOGGER.info("设备[%s]定位完成", model)
+        self._last_devices_data = devices_data
+        self._scheduler.record(imei, device_info)
+        self._apply_schedule()
+        self.async_set_updated_data(devices_data)
+        return True
+
+    async def _gather_limited(self, factories, concurrency=None):
+        """以受限并发执行协程工厂列表，结果按输入顺序返回.
+
+        任一任务抛出LoginExpiredError时取消其余任务并继续抛出.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or self._fetch_concurrency))
+
+        async def _run(factory):
+            async with semaphore:
+                return await factory()
+
+        tasks = [asyncio.ensure_future(_run(factory)) for factory in factories]
+        try:
+            return await asyncio.gather(*tasks)
+        except LoginExpiredError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _fetch_device_status(self, session:aiohttp.ClientSession, vin, lane=None):
+        """获取单个设备的位置状态，返回DeviceSnapshot或None，lane为限流优先级."""
+        imei = vin.get("imei") 
+        model = vin.get("model", "未知设备") 
+        version = vin.get("version", "未知版本")
+
+        url = 'https://i.mi.com/find/device/status?ts={}&fid={}'.format(
+            int(round(time.time() * 1000)), imei)
+        _send_find_device_command_header = {
+            'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
+        try:
+            r = await self.requester.request(
+                session, "GET", url, "device_status", lane, headers=_send_find_device_command_header)
+
+            # 检查HTTP状态码
+            if r.status == 401:
+                _LOGGER.warning("获取设备位置时登录失效(401)，需要重新登录")
+                self.login_result = False
+                raise LoginExpiredError(imei)
+
+            if r.status != 200:
+                _LOGGER.warning(f"获取设备[{model}]位置失败，HTTP状态码: {r.status}")
+                return None
+
+            response_data = json.loads(await r.text())
+
+            # 检查API返回的错误码
+            if isinstance(response_data, dict) and response_data.get('code') in [401, 6]:
+                _LOGGER.warning("API返回登录失效错误码(%s)，需要重新登录", response_data.get('code'))
+                self.login_result = False
+                raise LoginExpiredError(imei)
+
+            if 'data' not in response_data:
+                _LOGGER.warning(f"设备[{model}]位置数据格式异常，缺少data字段")
+                return None
+
+            _LOGGER.debug(f"获取设备[{model}]位置数据成功")
+
+            # 提取电量信息（如果可用）
+            power = None
+            if "powerLevel" in response_data['data']:
+                try:
+                    power = int(response_data['data']['powerLevel'].get('value', 0))
+                except (TypeError, ValueError):
+                    # 电量格式异常时只丢弃电量，保留位置等其他数据
+                    _LOGGER.debug(f"设备[{model}]电量格式异常: {response_data['data']['powerLevel']}")
+
+            # 提取设备状态（开启/关闭）
+            status = response_data['data'].get('status')
+
+            # 检查是否有位置数据
+            location = None
+            location_time = None
+            phone = None
+
+            # 检查位置receipt数据是否可用
+            if "location" in response_data['data'] and "receipt" in response_data['data']['location']:
+                location_receipt = response_data['data']['location']['receipt']
+
+                gpsInfoTransformed = location_receipt.get('gpsInfoTransformed', [])
+
+                # 记录坐标系转换列表
+                if not gpsInfoTransformed:
+                    _LOGGER.warning(f"设备[{model}]无可用坐标系转换列表")
+
+                # 获取位置更新时间
+                if 'infoTime' in location_receipt:
+                    location_time = int(location_receipt['infoTime'])
+
+                    # 判断位置是否更新
+                    last_update = self._last_position_update.get(imei, 0)
+                    if location_time > last_update:
+                        self._last_position_update[imei] = location_time
+                        _LOGGER.info("设备[%s]位置已更新，时间: %s", model, format_timestamp(location_time))
+
+                # 处理GPS坐标：一次解析出三种坐标系，缺失的坐标系由已有坐标换算
+                if gpsInfoTransformed or 'gpsInfo' in location_receipt:
+                    location = LocationFix.from_receipt(location_receipt)
+                    if not location:
+                        _LOGGER.warning(f"设备[{model}]未找到任何坐标系数据")
+
+                    # 添加其他位置数据
+                    phone = location_receipt.get('phone')
+
+            # 如果没有位置数据，记录日志
+            if not location:
+                _LOGGER.warning(f"设备[{model}]没有位置数据可用，查找设备可能未成功触发")
+                # 即使位置数据不完整也返回设备信息
+                return DeviceSnapshot(imei, model, version, power=power, status=status,
+                                      location_time=location_time, phone=phone)
+
+            # 实体显示的坐标按选择的坐标系类型取值
+            lon, lat = location.get(self._coordinate_type)
+            return DeviceSnapshot(
+                imei, model, version,
+                power=power,
+                status=status,
+                location=location,
+                latitude=lat,
+                longitude=lon,
+                accuracy=location.accuracy,
+                coordinate_type=self._coordinate_type,
+                location_time=location_time,
+                phone=phone,
+            )
+        except LoginExpiredError:
+            raise
+        except Exception as e:
+            _LOGGER.error(f"处理设备[{model}]位置时出错: {str(e)}")
+            return None
+
+    async def _poll_device_fix(self, session:aiohttp.ClientSession, vin, baseline, deadline, semaphore,
+                               lane=None):
+        """以递增间隔轮询单个设备状态，直到infoTime超过baseline或到达截止时间."""
+        imei = vin["imei"]
+        model = vin.get("model", "未知设备")
+        loop = asyncio.get_running_loop()
+        delay = ADAPTIVE_POLL_INITIAL_DELAY
+        device_info = None
+        while True:
+            await asyncio.sleep(max(0, min(delay, deadline - loop.time())))
+            async with semaphore:
+                device_info = await self._fetch_device_status(session, vin, lane) or device_info
+            if self._last_position_update.get(imei, 0) > baseline:
+                _LOGGER.debug("设备[%s]已返回新定位", model)
+                return device_info
+            if loop.time() >= deadline:
+                _LOGGER.info("设备[%s]在等待时间内未返回新定位，使用最近一次数据", model)
+                return device_info
+            delay = min(delay * ADAPTIVE_POLL_BACKOFF, ADAPTIVE_POLL_MAX_DELAY)
+
+    async def _get_device_location(self, session:aiohttp.ClientSession, wait_for=None, imeis=None):
+        """并发获取设备位置信息，返回 {imei: DeviceSnapshot}.
+
+        imeis不为None时只获取其中的设备.
+        wait_for为 {imei: 发送查找命令前的infoTime}，其中的设备会被轮询直到
+        返回新定位或超过_fix_wait_timeout秒；其余设备只请求一次.
+        """
         if not self._device_info:
             _LOGGER.warning("没有设备信息，无法获取位置")
-            return []
+            return {}
             
-        devices_info = []
-        device_count = len(self._device_info)
-        _LOGGER.info("开始获取%d个设备的位置信息", device_count)
-        
+        wait_for = wait_for or {}
+        device_count = len(self._device_info) if imeis is None else len(imeis)
+        _LOGGER.info("开始获取%d个设备的位置信息，并发数: %s", device_count, self._fetch_concurrency)
+
+        semaphore = asyncio.Semaphore(max(1, self._fetch_concurrency))
+        deadline = asyncio.get_running_loop().time() + self._fix_wait_timeout
+
+        async def _fetch_once(vin):
+            async with semaphore:
+                return await self._fetch_device_status(session, vin)
+
+        factories = []
         for vin in self._device_info:
-            imei = vin.get("imei") 
-            model = vin.get("model", "未知设备") 
-            version = vin.get("version", "未知版本")
-            
+            imei = vin.get("imei")
             if not imei:
-                _LOGGER.warning(f"设备[{model}]没有IMEI，跳过获取位置")
+                _LOGGER.warning(f"设备[{vin.get('model', '未知设备')}]没有IMEI，跳过获取位置")
                 continue
-                
-            url = 'https://i.mi.com/find/device/status?ts={}&fid={}'.format(
-                int(round(time.time() * 1000)), imei)
-            _send_find_device_command_header = {
-                'Cookie': 'userId={};serviceToken={}'.format(self.userId, self._Service_Token)}
-            try:
-                with async_timeout.timeout(15):
-                    r = await session.get(url, headers=_send_find_device_command_header)
-                
-                # 检查HTTP状态码
-                if r.status == 401:
-                    _LOGGER.warning("获取设备位置时登录失效(401)，需要重新登录")
-                    self.login_result = False
-                    return []
-                
-                if r.status != 200:
-                    _LOGGER.warning(f"获取设备[{model}]位置失败，HTTP状态码: {r.status}")
-                    continue
-                    
-                response_data = json.loads(await r.text())
-                
-                # 检查API返回的错误码
-                if isinstance(response_data, dict) and response_data.get('code') in [401, 6]:
-                    _LOGGER.warning("API返回登录失效错误码(%s)，需要重新登录", response_data.get('code'))
-                    self.login_result = False
-                    return []
-                
-                if 'data' not in response_data:
-                    _LOGGER.warning(f"设备[{model}]位置数据格式异常，缺少data字段")
-                    continue
-                
-                _LOGGER.debug(f"获取设备[{model}]位置数据成功")
+            if imeis is not None and imei not in imeis:
+                continue
+            if imei in wait_for:
+                factories.append(functools.partial(
+                    self._poll_device_fix, session, vin, wait_for[imei], deadline, semaphore))
+            else:
+                factories.append(functools.partial(_fetch_once, vin))
 
-                # 创建设备基本信息字典
-                device_info = {
-                    "imei": imei,
-                    "model": model,
-                    "version": version
-                }
-                
-                # 提取电量信息（如果可用）
-                if "powerLevel" in response_data['data']:
-                    device_info["device_power"] = response_data['data']['powerLevel'].get('value', 0)
-                
-                # 提取设备状态（开启/关闭）
-                if "status" in response_data['data']:
-                    device_info["device_status"] = response_data['data']['status']
-                
-                # 检查是否有位置数据
-                location_data_available = False
-                position_updated = False
-                current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # 检查位置receipt数据是否可用
-                if "location" in response_data['data'] and "receipt" in response_data['data']['location']:
-                    location_receipt = response_data['data']['location']['receipt']
-                    
-                    gpsInfoTransformed = location_receipt.get('gpsInfoTransformed', [])
-                    
-                    # 记录坐标系转换列表
-                    if not gpsInfoTransformed:
-                        _LOGGER.warning(f"设备[{model}]无可用坐标系转换列表")
-
-                    # 获取位置更新时间
-                    if 'infoTime' in location_receipt:
-                        info_time_ms = int(location_receipt['infoTime'])
-                        time_array = time.localtime(info_time_ms / 1000)
-                        formatted_time = time.strftime("%Y-%m-%d %H:%M:%S", time_array)
-                        device_info["device_location_update_time"] = formatted_time
-                        
-                        # 判断位置是否更新
-                        last_update = self._last_position_update.get(imei, 0)
-                        if info_time_ms > last_update:
-                            self._last_position_update[imei] = info_time_ms
-                            position_updated = True
-                            _LOGGER.info(f"设备[{model}]位置已更新，时间: {formatted_time}")
-
-                    # 处理GPS坐标
-                    if gpsInfoTransformed:
-                        location_info_json = None
-                        
-                        # 根据选择的坐标系类型获取对应的坐标信息
-                        if self._coordinate_type == "original" and 'gpsInfo' in location_receipt:
-                            location_info_json = location_receipt.get('gpsInfo', {})
-                        else:
-                            # 在转换列表中查找指定的坐标系
-                            for item in gpsInfoTransformed:
-                                if item.get('coordinateType') == self._coordinate_type:
-                                    location_info_json = item
-                                    break
-                        
-                        # 如果找不到指定坐标系，尝试使用第一个可用的
-                        if not location_info_json and gpsInfoTransformed:
-                            location_info_json = gpsInfoTransformed[0]
-                            _LOGGER.info(f"未找到匹配坐标系 {self._coordinate_type}，使用第一个可用坐标系")
-                        
-                        if location_info_json:
-                            device_info["device_lat"] = location_info_json.get('latitude')
-                            device_info["device_lon"] = location_info_json.get('longitude')
-                            device_info["device_accuracy"] = int(location_info_json.get('accuracy', 0))
-                            device_info["coordinate_type"] = location_info_json.get('coordinateType')
-                            location_data_available = True
-                        else:
-                            _LOGGER.warning(f"设备[{model}]未找到任何坐标系数据")
-
-                        # 添加其他位置数据
-                        if 'phone' in location_receipt:
-                            device_info["device_phone"] = location_receipt.get('phone', 0)
-                
-                # 如果没有位置数据，记录日志
-                if not location_data_available:
-                    _LOGGER.warning(f"设备[{model}]没有位置数据可用，查找设备可能未成功触发")
-                
-                # 添加设备信息到列表，即使位置数据不完整
-                devices_info.append(device_info)
-            except Exception as e:
-                _LOGGER.error(f"处理设备[{model}]位置时出错: {str(e)}")
+        try:
+            # 并发上限由semaphore控制，此处不再额外限制
+            results = await self._gather_limited(factories, concurrency=len(factories))
+        except LoginExpiredError as err:
+            _LOGGER.warning("设备[%s]登录失效，已取消其余位置请求", err)
+            return {}
+
+        devices_info = {device_info.imei: device_info for device_info in results if device_info}
         
         # 记录警告如果没有设备数据
         devices_count = len(devices_info)
@@ -547,175 +849,162 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
         
         return devices_info
 
-    def GCJ2WGS(self, lon, lat):
-        """GCJ-02坐标转WGS-84坐标."""
-        if not lon or not lat:
-            return [lon, lat]
-            
-        a = 6378245.0 # 克拉索夫斯基椭球参数长半轴a
-        ee = 0.00669342162296594323 #克拉索夫斯基椭球参数第一偏心率平方
-        PI = 3.14159265358979324 # 圆周率
-
-        x = lon - 105.0
-        y = lat - 35.0
-
-        dLon = 300.0 + x + 2.0 * y + 0.1 * x * x + 0.1 * x * y + 0.1 * math.sqrt(abs(x));
-        dLon += (20.0 * math.sin(6.0 * x * PI) + 20.0 * math.sin(2.0 * x * PI)) * 2.0 / 3.0;
-        dLon += (20.0 * math.sin(x * PI) + 40.0 * math.sin(x / 3.0 * PI)) * 2.0 / 3.0;
-        dLon += (150.0 * math.sin(x / 12.0 * PI) + 300.0 * math.sin(x / 30.0 * PI)) * 2.0 / 3.0;
-
-        dLat = -100.0 + 2.0 * x + 3.0 * y + 0.2 * y * y + 0.1 * x * y + 0.2 * math.sqrt(abs(x));
-        dLat += (20.0 * math.sin(6.0 * x * PI) + 20.0 * math.sin(2.0 * x * PI)) * 2.0 / 3.0;
-        dLat += (20.0 * math.sin(y * PI) + 40.0 * math.sin(y / 3.0 * PI)) * 2.0 / 3.0;
-        dLat += (160.0 * math.sin(y / 12.0 * PI) + 320 * math.sin(y * PI / 30.0)) * 2.0 / 3.0;
-        radLat = lat / 180.0 * PI
-        magic = math.sin(radLat)
-        magic = 1 - ee * magic * magic
-        sqrtMagic = math.sqrt(magic)
-        dLat = (dLat * 180.0) / ((a * (1 - ee)) / (magic * sqrtMagic) * PI);
-        dLon = (dLon * 180.0) / (a / sqrtMagic * math.cos(radLat) * PI);
-        wgsLon = lon - dLon
-        wgsLat = lat - dLat
-        return [wgsLon, wgsLat]
+    async def _locate_devices(self, session:aiohttp.ClientSession, imeis):
+        """向imeis中的设备发送查找命令并等待新定位，返回 {imei: DeviceSnapshot}."""
+        _LOGGER.info("执行定时查找设备操作...")
+        baselines = dict(self._last_position_update)
+        used_token = self._Service_Token
+        find_results = await self._send_find_device_command(session, imeis)
+
+        # 只有登录失效才重新登录，单个设备超时或出错不影响整个账号
+        if COMMAND_RESULT_AUTH in find_results.values():
+            _LOGGER.info("查找设备失败，尝试重新登录")
+            if await self._async_login(session, stale_token=used_token):
+                _LOGGER.info("重新登录成功，再次尝试查找设备")
+                find_results = await self._send_find_device_command(session, imeis)
+            else:
+                _LOGGER.warning("重新登录失败")
+
+        _LOGGER.info("查找设备执行结果: %s", find_results)
+
+        if self._adaptive_fix_wait:
+            # 自适应等待：轮询状态接口，设备返回新定位即停止
+            wait_for = {
+                imei: baselines.get(imei, 0)
+                for imei, outcome in find_results.items()
+                if outcome == COMMAND_RESULT_OK
+            }
+            _LOGGER.info("开始自适应等待%d个设备的新定位，最长%s秒...",
+                       len(wait_for), self._fix_wait_timeout)
+            location_data = await self._get_device_location(session, wait_for, imeis)
+        else:
+            # 查找命令发送后，等待一段时间让设备响应
+            wait_time = 15
+            _LOGGER.info(f"等待{wait_time}秒让设备响应定位请求...")
+            await asyncio.sleep(wait_time)
+
+            # 获取最新位置
+            _LOGGER.info("开始获取设备位置数据...")
+            location_data = await self._get_device_location(session, imeis=imeis)
+        return location_data
+
+    async def _split_fresh_devices(self, session:aiohttp.ClientSession, imeis):
+        """先读取状态接口，返回 (定位足够新的设备数据, 需要发送查找命令的IMEI列表)."""
+        status_data = await self._get_device_location(session, imeis=imeis)
+        cutoff = (time.time() - self._fix_freshness) * 1000
+        fresh = {
+            imei: device for imei, device in status_data.items()
+            if device.location and device.location_time and device.location_time >= cutoff
+        }
+        stale = [imei for imei in imeis if imei not in fresh]
+        _LOGGER.info("%d个设备的云端定位在%s秒内，跳过查找命令；%d个设备需要重新定位",
+                   len(fresh), self._fix_freshness, len(stale))
+        return fresh, stale
 
     async def _async_update_data(self):
         """更新数据，定时调用."""
-        _LOGGER.debug("开始数据更新周期，当前更新间隔为 %s 分钟，服务: %s", self._scan_interval, self.service)
+        _LOGGER.debug("开始数据更新周期，基础更新间隔为 %s 分钟", self._scan_interval)
         
         # 获取设备数据
-        devices_data = []
+        devices_data = {}
         
         try:
-            session = async_get_clientsession(self.hass)
+            session = self._get_session()
+
+            # 首次更新时尝试恢复已保存的会话，失效时会在后续请求中触发重新登录
+            if not self._session_restored:
+                await self._async_restore_session()
             
-            # 如果设置了特定服务，优先处理
-            if self.service in ["noise", "lost", "clipboard"]:
-                if self.login_result is True:
-                    _LOGGER.info("执行服务: %s", self.service)
-                    if self.service == "noise":
-                        service_result = await self._send_noise_command(session)
-                    elif self.service == 'lost':
-                        service_result = await self._send_lost_command(session)
-                    elif self.service == 'clipboard':
-                        service_result = await self._send_clipboard_command(session)
-                    
-                    # 如果服务执行失败可能是登录失效，尝试重新登录
-                    if not service_result:
-                        _LOGGER.info("服务执行失败，尝试重新登录")
-                        self.login_result = False
-                else:
-                    _LOGGER.info("用户未登录，将在下一步中执行登录")
-                        
+            # i.mi.com熔断期间不发送请求，直接使用缓存数据
+            if not self.requester.available(FIND_HOST):
+                raise CircuitOpenError(FIND_HOST, self.requester.retry_after(FIND_HOST))
+
             # 处理登录状态
             if not self.login_result:
                 # 用户未登录或登录失效，执行登录流程
-                _LOGGER.info("开始执行登录流程")
-                session.cookie_jar.clear()
-                
-                # 按顺序执行登录步骤
-                if not await self._get_sign(session):
-                    _LOGGER.warning("获取sign失败")
-                    return self._last_devices_data or []
-                
-                if not await self._serviceLoginAuth2(session):
-                    _LOGGER.warning('登录验证失败')
-                    return self._last_devices_data or []
-                
-                if self._serviceLoginAuth2_json.get('code', -1) != 0:
-                    _LOGGER.warning('登录验证返回错误码: %s', self._serviceLoginAuth2_json.get('code', -1))
-                    return self._last_devices_data or []
-                
-                # 登录成功，执行miai登录
-                if not await self._login_miai(session):
-                    _LOGGER.warning('登录小米云失败')
-                    return self._last_devices_data or []
-                
-                if not await self._get_device_info(session):
-                    _LOGGER.warning('获取设备信息失败')
-                    return self._last_devices_data or []
-                
-                _LOGGER.info("登录成功，获取到%d个设备信息", len(self._device_info))
-                self.login_result = True
-                
-                # 重新执行原服务请求（如果有）
-                if self.service in ["noise", "lost", "clipboard"]:
-                    _LOGGER.info("重新尝试执行服务: %s", self.service)
-                    if self.service == "noise":
-                        await self._send_noise_command(session)
-                    elif self.service == 'lost':
-                        await self._send_lost_command(session)
-                    elif self.service == 'clipboard':
-                        await self._send_clipboard_command(session)
-            
-            # 执行定时查找设备逻辑
-            _LOGGER.info("执行定时查找设备操作...")
-            find_result = await self._send_find_device_command(session)
-            
-            # 如果发送查找命令失败且是因为登录问题，尝试重新登录并再次查找
-            if not find_result and not self.login_result:
-                _LOGGER.info("查找设备失败，尝试重新登录")
-                session.cookie_jar.clear()
-                
-                # 尝试执行完整的登录流程
-                login_success = (await self._get_sign(session) and 
-                                await self._serviceLoginAuth2(session) and 
-                                self._serviceLoginAuth2_json.get('code', -1) == 0 and
-                                await self._login_miai(session) and
-                                await self._get_device_info(session))
-                
-                if login_success:
-                    self.login_result = True
-                    _LOGGER.info("重新登录成功，再次尝试查找设备")
-                    find_result = await self._send_find_device_command(session)
-                else:
-                    _LOGGER.warning("重新登录失败")
+                if not await self._async_login(session):
+                    return self._last_devices_data or {}
             
-            _LOGGER.info("查找设备执行结果: %s", "成功" if find_result else "失败")
-            
-            # 查找命令发送后，等待一段时间让设备响应
-            wait_time = 15
-            _LOGGER.info(f"等待{wait_time}秒让设备响应定位请求...")
-            await asyncio.sleep(wait_time)
-            
-            # 获取最新位置
-            _LOGGER.info("开始获取设备位置数据...")
-            location_data = await self._get_device_location(session)
+            all_imeis = [vin.get("imei") for vin in self._device_info if vin.get("imei")]
+            # 移除已不在账号下的设备，否则其过期的截止时间会一直留在堆顶
+            self._scheduler.retain(all_imeis)
+            # 只轮询已到期的设备；实体更新等非调度触发的刷新不唤醒未到期的手机，
+            # 服务触发的刷新轮询所有设备
+            if self._force_full_refresh:
+                self._force_full_refresh = False
+                due_imeis = all_imeis
+            else:
+                due_imeis = self._scheduler.due(all_imeis)
+            if not due_imeis:
+                _LOGGER.debug("没有到期的设备，跳过本次轮询")
+                self._apply_schedule()
+                return self._last_devices_data or {}
+            _LOGGER.info("本次轮询%d/%d个设备", len(due_imeis), len(all_imeis))
+
+            # 启用新鲜度窗口时先读取状态，云端已有较新定位的设备不再唤醒手机
+            fresh_data = {}
+            find_imeis = due_imeis
+            if self._fix_freshness:
+                fresh_data, find_imeis = await self._split_fresh_devices(session, due_imeis)
+
+            if find_imeis:
+                location_data = await self._locate_devices(session, find_imeis)
+                location_data = {**fresh_data, **location_data}
+            else:
+                location_data = fresh_data
+
+            # 按本次结果安排各设备的下次轮询
+            for imei in due_imeis:
+                self._scheduler.record(imei, location_data.get(imei))
+            self._apply_schedule()
             
             if not location_data:
                 _LOGGER.warning("未能获取设备位置数据")
                 # 如果是登录原因导致的失败，返回上次的数据
                 if not self.login_result:
                     _LOGGER.info("登录状态已失效，返回上次的设备数据")
-                    return self._last_devices_data or []
+                    return self._last_devices_data or {}
                     
                 # 如果不是登录原因，可能是其他原因，创建基本设备信息
                 if self._device_info:
                     _LOGGER.info("尝试创建基本设备信息...")
-                    basic_devices = []
+                    # 保留其他设备上次的数据，只为没有数据的设备创建基本信息
+                    basic_devices = dict(self._last_devices_data)
                     for vin in self._device_info:
-                        basic_devices.append({
-                            "imei": vin.get("imei", ""),
-                            "model": vin.get("model", "未知设备"),
-                            "version": vin.get("version", "未知版本"),
-                            "device_status": "unknown"
-                        })
+                        if vin.get("imei", "") in basic_devices:
+                            continue
+                        basic_devices[vin.get("imei", "")] = DeviceSnapshot(
+                            vin.get("imei", ""),
+                            vin.get("model", "未知设备"),
+                            vin.get("version", "未知版本"),
+                            status="unknown",
+                        )
                     _LOGGER.debug("创建了%d个基本设备信息对象", len(basic_devices))
                     # 保存基本设备数据以便恢复
                     self._last_devices_data = basic_devices
                     return basic_devices
-                return self._last_devices_data or []
+                return self._last_devices_data or {}
             else:
                 _LOGGER.info(f"获取设备位置成功，返回{len(location_data)}个设备数据")
+                # 未到期的设备沿用上次的数据，并移除账号下已不存在的设备
+                devices_data = {
+                    imei: device for imei, device in self._last_devices_data.items()
+                    if imei in all_imeis
+                }
+                devices_data.update(location_data)
                 # 保存获取到的设备数据
-                self._last_devices_data = location_data
-                devices_data = location_data
+                self._last_devices_data = devices_data
 
-            # 成功获取设备数据后，检查电量并调整轮询频率（如果启用了低电量功能）
-            if self._low_battery_polling and devices_data:
-                self._check_battery_levels(devices_data)
-            
             return devices_data
 
+        except CircuitOpenError as error:
+            _LOGGER.warning("小米云接口熔断中，暂停请求: %s", error)
+            # 熔断期间不必频繁唤醒，恢复后由调度器重新设置间隔
+            self.update_interval = max(self.update_interval, datetime.timedelta(seconds=error.retry_after))
+            if self._last_devices_data:
+                _LOGGER.info("使用上次获取的设备数据")
+                return self._last_devices_data
+            raise UpdateFailed(f"小米云接口熔断中: {error}")
         except ClientConnectorError as error:
             _LOGGER.error(f"网络连接错误: {error}")
             if self._last_devices_data:
@@ -729,41 +1018,6 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
                 return self._last_devices_data
             raise UpdateFailed(f"未处理的异常: {str(e)}")
 
-    def _check_battery_levels(self, devices_data):
-        """检查设备电量并根据需要调整轮询频率."""
-        if not self._low_battery_polling:
-            return
-            
-        # 查找任何低于阈值的设备
-        low_battery_device = None
-        for device in devices_data:
-            battery_level = device.get("device_power")
-            if battery_level is not None and int(battery_level) < self._low_battery_threshold:
-                low_battery_device = device
-                break
-                
-        current_is_low_battery = low_battery_device is not None
-        
-        # 如果电量状态变化，更新轮询间隔
-        if current_is_low_battery != self._is_low_battery_mode:
-            self._is_low_battery_mode = current_is_low_battery
-            
-            if current_is_low_battery:
-                # 切换到低电量模式
-                _LOGGER.info("检测到设备 [%s] 电量低于 %s%%，切换到低电量更新模式 (%s分钟)",
-                           low_battery_device.get("model", "未知设备"),
-                           self._low_battery_threshold,
-                           self._low_battery_interval)
-                self._scan_interval = self._low_battery_interval
-            else:
-                # 恢复正常模式
-                _LOGGER.info("所有设备电量恢复正常，恢复标准更新间隔 (%s分钟)", 
-                           self._normal_scan_interval)
-                self._scan_interval = self._normal_scan_interval
-                
-            # 更新协调器更新间隔
-            self._update_interval_changed(self._scan_interval)
-
     async def async_config_entry_first_refresh(self):
         """执行首次刷新，在Home Assistant启动时调用."""
         _LOGGER.info("执行小米云服务首次数据刷新...")
@@ -785,31 +1039,75 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.info("尝试重新刷新小米云服务数据...")
         await self.async_refresh()
 
-    async def _update_interval_changed(self, new_interval):
-        """更新间隔时间发生变化时处理."""
-        try:
-            new_interval = int(new_interval)  # 确保转换为整数
-            if new_interval != self._scan_interval:
-                old_interval = self._scan_interval
-                self._scan_interval = new_interval
-                _LOGGER.info("位置更新间隔已从 %s 分钟更改为 %s 分钟", old_interval, new_interval)
-                
-                # 更新协调器的更新间隔
-                self.update_interval = datetime.timedelta(minutes=self._scan_interval)
-                
-                # 取消现有的刷新计划并重新安排
-                self._schedule_refresh()
-                
-                # 可选：立即触发一次刷新以应用新设置
-                await self.async_refresh()
-                
-                return True
+    @callback
+    def async_set_base_interval(self, new_interval):
+        """基础更新间隔（分钟）变化时重新调度所有设备."""
+        new_interval = int(new_interval)  # 确保转换为整数
+        if new_interval == self._scan_interval:
             _LOGGER.debug("更新间隔未变化，仍为 %s 分钟", self._scan_interval)
             return False
-        except Exception as e:
-            _LOGGER.error("更新间隔设置失败: %s", str(e))
-            return False
-        
+        old_interval = self._scan_interval
+        self._scan_interval = new_interval
+        _LOGGER.info("位置更新间隔已从 %s 分钟更改为 %s 分钟", old_interval, new_interval)
+        self._apply_profile()
+        self._apply_schedule()
+        return True
+
+    @callback
+    def async_set_polling_profiles(self, profiles):
+        """替换时段规则，立即按当前时段切换基础间隔，无需重新加载."""
+        self._polling_profiles = profiles or []
+        _LOGGER.info("轮询时段规则已更新，共%d条", len(self._polling_profiles))
+        self._apply_profile()
+        self._apply_schedule()
+        self._schedule_profile_boundary()
+
+    def _apply_profile(self):
+        """按当前时段计算基础间隔，变化时通知调度器."""
+        interval = active_interval(self._polling_profiles, now(), self._scan_interval)
+        if interval == self._active_interval:
+            return
+        _LOGGER.info("轮询时段切换，基础更新间隔从 %s 分钟变为 %s 分钟", self._active_interval, interval)
+        self._active_interval = interval
+        self._scheduler.set_base_interval(interval * 60)
+
+    def _schedule_profile_boundary(self):
+        """在下一个时段边界切换基础间隔，边界处只重新调度，不额外轮询."""
+        if self._unsub_profile_boundary:
+            self._unsub_profile_boundary()
+            self._unsub_profile_boundary = None
+        seconds = seconds_until_boundary(self._polling_profiles, now())
+        if seconds is None:
+            return
+        self._unsub_profile_boundary = async_track_point_in_utc_time(
+            self.hass,
+            self._handle_profile_boundary,
+            utcnow() + datetime.timedelta(seconds=seconds + 1),
+        )
+
+    @callback
+    def _handle_profile_boundary(self, _now):
+        self._unsub_profile_boundary = None
+        self._apply_profile()
+        self._apply_schedule()
+        self._schedule_profile_boundary()
+
+    @callback
+    def async_set_low_battery(self, polling, threshold, interval):
+        """低电量设置变化时更新调度器."""
+        self._low_battery_polling = polling
+        self._low_battery_threshold = int(threshold)
+        self._low_battery_interval = int(interval)
+        self._scheduler.set_low_battery(
+            self._low_battery_threshold if polling else None, self._low_battery_interval * 60)
+        self._apply_schedule()
+
+    def _apply_schedule(self):
+        """按最早到期的设备设置下次刷新时间."""
+        self.update_interval = datetime.timedelta(seconds=self._scheduler.seconds_until_next())
+        if self._listeners:
+            self._schedule_refresh()
+
     def _schedule_refresh(self):
         """重新安排下一次刷新."""
         if self._unsub_refresh:
@@ -820,7 +1118,7 @@ class XiaomiCloudDataUpdateCoordinator(DataUpdateCoordinator):
             self._handle_refresh_interval,
             utcnow() + self.update_interval
         )
-        _LOGGER.info("已重新安排刷新时间，下次将在 %s 分钟后执行", self._scan_interval)
+        _LOGGER.info("已重新安排刷新时间，下次将在 %.0f 秒后执行", self.update_interval.total_seconds())
 
     async def _schedule_initial_refresh(self):
         """在初始化后立即调度一次以确保正确应用更新间隔."""
@@ -20,11 +20,20 @@ from homeassistant.const import (
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 
 from .DataUpdateCoordinator import XiaomiCloudDataUpdateCoordinator
+from .session_store import XiaomiSessionStore
+from .gaode import GaodeClient, GaodeQuota
+from .geocode_cache import GeocodeCache
+from .geocoding import AddressResolver
+from .offline_geocoder import OfflineGeocoder
+from .profiles import parse_profiles
 
 from .const import (
     DOMAIN,
     UNDO_UPDATE_LISTENER,
     COORDINATOR,
+    GAODE_CLIENT,
+    ADDRESS_RESOLVER,
+    OPTIONS_SNAPSHOT,
     CONF_COORDINATE_TYPE,
     CONF_COORDINATE_TYPE_BAIDU,
     CONF_COORDINATE_TYPE_ORIGINAL,
@@ -37,10 +46,52 @@ from .const import (
     DEFAULT_LOW_BATTERY_THRESHOLD,
     CONF_LOW_BATTERY_INTERVAL,
     DEFAULT_LOW_BATTERY_INTERVAL,
+    CONF_FETCH_CONCURRENCY,
+    DEFAULT_FETCH_CONCURRENCY,
+    CONF_ADAPTIVE_FIX_WAIT,
+    DEFAULT_ADAPTIVE_FIX_WAIT,
+    CONF_FIX_WAIT_TIMEOUT,
+    DEFAULT_FIX_WAIT_TIMEOUT,
+    CONF_FIX_FRESHNESS,
+    DEFAULT_FIX_FRESHNESS,
+    CONF_POLLING_PROFILES,
+    DEFAULT_POLLING_PROFILES,
+    CONF_XIAOMI_RATE_LIMIT,
+    DEFAULT_XIAOMI_RATE_LIMIT,
+    CONF_XIAOMI_BURST,
+    DEFAULT_XIAOMI_BURST,
+    CONF_GEOCODE_PRECISION,
+    DEFAULT_GEOCODE_PRECISION,
+    CONF_GEOCODE_CACHE_TTL,
+    DEFAULT_GEOCODE_CACHE_TTL,
+    CONF_ADDRESS_MIN_DISTANCE,
+    DEFAULT_ADDRESS_MIN_DISTANCE,
+    CONF_GAODE_DAILY_LIMIT,
+    DEFAULT_GAODE_DAILY_LIMIT,
+    CONF_GAODE_QPS,
+    DEFAULT_GAODE_QPS,
+    CONF_OFFLINE_GEOCODER,
+    DEFAULT_OFFLINE_GEOCODER,
+    OFFLINE_GEOCODER_DISABLED,
+    CONF_OFFLINE_DATASET,
+    DEFAULT_OFFLINE_DATASET,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _load_polling_profiles(config_entry):
+    """读取并解析轮询时段规则，格式错误时忽略所有规则."""
+    text = config_entry.options.get(
+        CONF_POLLING_PROFILES,
+        config_entry.data.get(CONF_POLLING_PROFILES, DEFAULT_POLLING_PROFILES)
+    )
+    try:
+        return parse_profiles(text)
+    except ValueError as e:
+        _LOGGER.error("轮询时段规则格式错误，将使用固定更新间隔: %s", e)
+        return []
+
 async def async_setup(hass: HomeAssistant, config: Config) -> bool:
     """设置配置好的小米云服务."""
     hass.data[DOMAIN] = {"devices": set(), "unsub_device_tracker": {}}
@@ -85,6 +136,73 @@ async def async_setup_entry(hass, config_entry) -> bool:
         config_entry.data.get(CONF_LOW_BATTERY_INTERVAL, DEFAULT_LOW_BATTERY_INTERVAL)
     )
 
+    fetch_concurrency = config_entry.options.get(
+        CONF_FETCH_CONCURRENCY,
+        config_entry.data.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY)
+    )
+
+    adaptive_fix_wait = config_entry.options.get(
+        CONF_ADAPTIVE_FIX_WAIT,
+        config_entry.data.get(CONF_ADAPTIVE_FIX_WAIT, DEFAULT_ADAPTIVE_FIX_WAIT)
+    )
+
+    fix_wait_timeout = config_entry.options.get(
+        CONF_FIX_WAIT_TIMEOUT,
+        config_entry.data.get(CONF_FIX_WAIT_TIMEOUT, DEFAULT_FIX_WAIT_TIMEOUT)
+    )
+
+    fix_freshness = config_entry.options.get(
+        CONF_FIX_FRESHNESS,
+        config_entry.data.get(CONF_FIX_FRESHNESS, DEFAULT_FIX_FRESHNESS)
+    )
+
+    polling_profiles = _load_polling_profiles(config_entry)
+
+    xiaomi_rate_limit = config_entry.options.get(
+        CONF_XIAOMI_RATE_LIMIT,
+        config_entry.data.get(CONF_XIAOMI_RATE_LIMIT, DEFAULT_XIAOMI_RATE_LIMIT)
+    )
+
+    xiaomi_burst = config_entry.options.get(
+        CONF_XIAOMI_BURST,
+        config_entry.data.get(CONF_XIAOMI_BURST, DEFAULT_XIAOMI_BURST)
+    )
+
+    geocode_precision = config_entry.options.get(
+        CONF_GEOCODE_PRECISION,
+        config_entry.data.get(CONF_GEOCODE_PRECISION, DEFAULT_GEOCODE_PRECISION)
+    )
+
+    geocode_cache_ttl = config_entry.options.get(
+        CONF_GEOCODE_CACHE_TTL,
+        config_entry.data.get(CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL)
+    )
+
+    address_min_distance = config_entry.options.get(
+        CONF_ADDRESS_MIN_DISTANCE,
+        config_entry.data.get(CONF_ADDRESS_MIN_DISTANCE, DEFAULT_ADDRESS_MIN_DISTANCE)
+    )
+
+    gaode_daily_limit = config_entry.options.get(
+        CONF_GAODE_DAILY_LIMIT,
+        config_entry.data.get(CONF_GAODE_DAILY_LIMIT, DEFAULT_GAODE_DAILY_LIMIT)
+    )
+
+    gaode_qps = config_entry.options.get(
+        CONF_GAODE_QPS,
+        config_entry.data.get(CONF_GAODE_QPS, DEFAULT_GAODE_QPS)
+    )
+
+    offline_mode = config_entry.options.get(
+        CONF_OFFLINE_GEOCODER,
+        config_entry.data.get(CONF_OFFLINE_GEOCODER, DEFAULT_OFFLINE_GEOCODER)
+    )
+
+    offline_dataset = config_entry.options.get(
+        CONF_OFFLINE_DATASET,
+        config_entry.data.get(CONF_OFFLINE_DATASET, DEFAULT_OFFLINE_DATASET)
+    )
+
     _LOGGER.info("初始化小米云服务...")
     _LOGGER.info("用户名: %s", username)
     _LOGGER.info("位置更新间隔: %s 分钟", update_interval)
@@ -93,24 +211,72 @@ async def async_setup_entry(hass, config_entry) -> bool:
     if low_battery_polling:
         _LOGGER.info("低电量快速更新已启用 - 阈值: %s%%, 更新间隔: %s分钟", 
                    low_battery_threshold, low_battery_interval)
+    _LOGGER.info("设备请求并发数: %s", fetch_concurrency)
+    _LOGGER.info("小米云请求限流: 每秒%s次，突发%s次", xiaomi_rate_limit, xiaomi_burst)
+    if adaptive_fix_wait:
+        _LOGGER.info("自适应定位等待已启用 - 最长等待: %s秒", fix_wait_timeout)
+    if fix_freshness:
+        _LOGGER.info("定位新鲜度窗口: %s秒，云端定位较新的设备不发送查找命令", fix_freshness)
+    if polling_profiles:
+        _LOGGER.info("已加载%d条轮询时段规则", len(polling_profiles))
 
     # 创建数据更新协调器
     coordinator = XiaomiCloudDataUpdateCoordinator(
         hass, username, password, update_interval, coordinate_type, gaode_api_key,
-        low_battery_polling, low_battery_threshold, low_battery_interval
+        low_battery_polling, low_battery_threshold, low_battery_interval,
+        fetch_concurrency,
+        adaptive_fix_wait=adaptive_fix_wait,
+        fix_wait_timeout=fix_wait_timeout,
+        fix_freshness=fix_freshness,
+        polling_profiles=polling_profiles,
+        rate_limit=xiaomi_rate_limit,
+        burst=xiaomi_burst,
+        session_store=XiaomiSessionStore(hass, config_entry.entry_id, username, password),
     )
     
+    # 地址传感器共享的高德客户端，按geohash网格缓存解析结果
+    geocode_cache = GeocodeCache(
+        hass, config_entry.entry_id, geocode_precision, geocode_cache_ttl
+    )
+    await geocode_cache.async_load()
+    # 按每日额度和QPS限制高德API调用
+    gaode_quota = GaodeQuota(hass, config_entry.entry_id, gaode_daily_limit)
+    await gaode_quota.async_load()
+    gaode_client = GaodeClient(hass, gaode_api_key, geocode_cache, gaode_quota, gaode_qps)
+
+    # 离线地址解析：在线程池中加载数据并构建KD树索引
+    offline_geocoder = None
+    if offline_mode != OFFLINE_GEOCODER_DISABLED:
+        try:
+            offline_geocoder = await hass.async_add_executor_job(
+                OfflineGeocoder.from_file, offline_dataset or None
+            )
+        except (OSError, ValueError) as e:
+            _LOGGER.error("加载离线地址数据失败，离线解析将不可用: %s", e)
+
     # 初始刷新数据
     await coordinator.async_refresh()
 
     if not coordinator.last_update_success:
+        await coordinator.async_close()
         raise ConfigEntryNotReady("无法从小米云服务获取数据，请检查网络连接和账号信息")
 
+    # 地址解析阶段：每次更新后为所有设备批量解析地址
+    resolver = AddressResolver(
+        hass, config_entry.entry_id, coordinator, gaode_client, int(address_min_distance),
+        offline_geocoder, offline_mode,
+    )
+    config_entry.async_on_unload(resolver.async_start())
+    await resolver.async_resolve()
+
     # 设置配置更新监听器
     undo_listener = config_entry.add_update_listener(update_listener)
     hass.data[DOMAIN][config_entry.entry_id] = {
         COORDINATOR: coordinator,
+        GAODE_CLIENT: gaode_client,
+        ADDRESS_RESOLVER: resolver,
         UNDO_UPDATE_LISTENER: undo_listener,
+        OPTIONS_SNAPSHOT: dict(config_entry.options),
     }
 
     # 设置平台
@@ -159,16 +325,30 @@ async def async_setup_entry(hass, config_entry) -> bool:
 
 async def async_unload_entry(hass, config_entry):
     """卸载配置入口."""
-    unload_ok = await hass.config_entries.async_forward_entry_unload(config_entry, DEVICE_TRACKER)
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        config_entry, [DEVICE_TRACKER, SENSOR_DOMAIN]
+    )
 
     # 取消更新监听器
     hass.data[DOMAIN][config_entry.entry_id][UNDO_UPDATE_LISTENER]()
 
     if unload_ok:
-        hass.data[DOMAIN].pop(config_entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await entry_data[COORDINATOR].async_close()
 
     return unload_ok
 
+async def async_remove_entry(hass, config_entry):
+    """删除配置入口时清除保存的登录会话."""
+    await XiaomiSessionStore(
+        hass,
+        config_entry.entry_id,
+        config_entry.data[CONF_USERNAME],
+        config_entry.data[CONF_PASSWORD],
+    ).async_remove()
+    await GeocodeCache(hass, config_entry.entry_id, DEFAULT_GEOCODE_PRECISION, 0).async_remove()
+    await GaodeQuota(hass, config_entry.entry_id, DEFAULT_GAODE_DAILY_LIMIT).async_remove()
+
 async def update_listener(hass, config_entry):
     """配置更新监听器."""
     try:
@@ -176,7 +356,21 @@ async def update_listener(hass, config_entry):
         _LOGGER.info("检测到配置更改，准备更新小米云服务...")
         
         # 获取当前coordinator实例
-        coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
+        entry_data = hass.data[DOMAIN][config_entry.entry_id]
+        coordinator = entry_data[COORDINATOR]
+
+        # 只修改了轮询时段规则时直接应用到调度器，无需重新加载
+        old_options = entry_data[OPTIONS_SNAPSHOT]
+        new_options = dict(config_entry.options)
+        entry_data[OPTIONS_SNAPSHOT] = new_options
+        changed_options = {
+            key for key in old_options.keys() | new_options.keys()
+            if old_options.get(key) != new_options.get(key)
+        }
+        if changed_options == {CONF_POLLING_PROFILES}:
+            coordinator.async_set_polling_profiles(_load_polling_profiles(config_entry))
+            _LOGGER.info("轮询时段规则已更新，无需重新加载")
+            return
         
         # 检查更新间隔是否变更
         old_update_interval = coordinator._scan_interval
@@ -222,12 +416,8 @@ async def update_listener(hass, config_entry):
         config_changed = False
         
         if old_update_interval != new_update_interval:
-            _LOGGER.info("位置更新间隔已从 %s 分钟更改为 %s 分钟", old_update_interval, new_update_interval)
-            # 更新normal_scan_interval
-            coordinator._normal_scan_interval = new_update_interval
-            # 如果不处于低电量模式，更新当前间隔
-            if not coordinator._is_low_battery_mode:
-                await coordinator._update_interval_changed(new_update_interval)
+            # 调度器以新的基础间隔重新调度所有设备
+            coordinator.async_set_base_interval(new_update_interval)
             config_changed = True
             
         if old_coordinate_type != new_coordinate_type:
@@ -254,28 +444,48 @@ async def update_listener(hass, config_entry):
             _LOGGER.info("低电量快速更新设置已从 %s 更改为 %s", 
                        "启用" if old_low_battery_polling else "禁用", 
                        "启用" if new_low_battery_polling else "禁用")
-            coordinator._low_battery_polling = new_low_battery_polling
             low_battery_config_changed = True
             config_changed = True
             
         if old_low_battery_threshold != new_low_battery_threshold:
             _LOGGER.info("低电量阈值已从 %s%% 更改为 %s%%", 
                        old_low_battery_threshold, new_low_battery_threshold)
-            coordinator._low_battery_threshold = int(new_low_battery_threshold)
             low_battery_config_changed = True
             config_changed = True
             
         if old_low_battery_interval != new_low_battery_interval:
             _LOGGER.info("低电量更新间隔已从 %s 分钟更改为 %s 分钟", 
                        old_low_battery_interval, new_low_battery_interval)
-            coordinator._low_battery_interval = int(new_low_battery_interval)
             low_battery_config_changed = True
             config_changed = True
             
-        # 如果低电量配置改变且设备处于低电量模式，需要立即应用新的低电量更新间隔
-        if low_battery_config_changed and coordinator._is_low_battery_mode:
+        # 检查设备请求并发数是否变更
+        new_fetch_concurrency = config_entry.options.get(
+            CONF_FETCH_CONCURRENCY,
+            config_entry.data.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY)
+        )
+        if coordinator._fetch_concurrency != int(new_fetch_concurrency):
+            _LOGGER.info("设备请求并发数已从 %s 更改为 %s",
+                       coordinator._fetch_concurrency, new_fetch_concurrency)
+            coordinator._fetch_concurrency = int(new_fetch_concurrency)
+            config_changed = True
+
+        # 检查定位新鲜度窗口是否变更
+        new_fix_freshness = config_entry.options.get(
+            CONF_FIX_FRESHNESS,
+            config_entry.data.get(CONF_FIX_FRESHNESS, DEFAULT_FIX_FRESHNESS)
+        )
+        if coordinator._fix_freshness != int(new_fix_freshness):
+            _LOGGER.info("定位新鲜度窗口已从 %s 秒更改为 %s 秒",
+                       coordinator._fix_freshness, new_fix_freshness)
+            coordinator._fix_freshness = int(new_fix_freshness)
+            config_changed = True
+
+        # 低电量配置改变时立即应用到调度器
+        if low_battery_config_changed:
             _LOGGER.info("低电量设置已更改，重新应用低电量更新间隔")
-            await coordinator._update_interval_changed(coordinator._low_battery_interval)
+            coordinator.async_set_low_battery(
+                new_low_battery_polling, new_low_battery_threshold, new_low_battery_interval)
         
         # 如果有配置变更，立即刷新数据
         if config_changed:
@@ -17,8 +17,40 @@ from .const import (
     CONF_LOW_BATTERY_THRESHOLD,
     DEFAULT_LOW_BATTERY_THRESHOLD,
     CONF_LOW_BATTERY_INTERVAL,
-    DEFAULT_LOW_BATTERY_INTERVAL
+    DEFAULT_LOW_BATTERY_INTERVAL,
+    CONF_FETCH_CONCURRENCY,
+    DEFAULT_FETCH_CONCURRENCY,
+    CONF_ADAPTIVE_FIX_WAIT,
+    DEFAULT_ADAPTIVE_FIX_WAIT,
+    CONF_FIX_WAIT_TIMEOUT,
+    DEFAULT_FIX_WAIT_TIMEOUT,
+    CONF_FIX_FRESHNESS,
+    DEFAULT_FIX_FRESHNESS,
+    CONF_POLLING_PROFILES,
+    DEFAULT_POLLING_PROFILES,
+    CONF_XIAOMI_RATE_LIMIT,
+    DEFAULT_XIAOMI_RATE_LIMIT,
+    CONF_XIAOMI_BURST,
+    DEFAULT_XIAOMI_BURST,
+    CONF_GEOCODE_PRECISION,
+    DEFAULT_GEOCODE_PRECISION,
+    CONF_GEOCODE_CACHE_TTL,
+    DEFAULT_GEOCODE_CACHE_TTL,
+    CONF_ADDRESS_MIN_DISTANCE,
+    DEFAULT_ADDRESS_MIN_DISTANCE,
+    CONF_GAODE_DAILY_LIMIT,
+    DEFAULT_GAODE_DAILY_LIMIT,
+    CONF_GAODE_QPS,
+    DEFAULT_GAODE_QPS,
+    CONF_OFFLINE_GEOCODER,
+    DEFAULT_OFFLINE_GEOCODER,
+    OFFLINE_GEOCODER_DISABLED,
+    OFFLINE_GEOCODER_FALLBACK,
+    OFFLINE_GEOCODER_PRIMARY,
+    CONF_OFFLINE_DATASET,
+    DEFAULT_OFFLINE_DATASET,
 )
+from .profiles import parse_profiles
 
 class XiaomiCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """小米云集成配置流程."""
@@ -81,7 +113,13 @@ class XiaomiCloudOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """管理选项."""
+        errors = {}
         if user_input is not None:
+            try:
+                parse_profiles(user_input.get("轮询时段规则"))
+            except ValueError:
+                errors["base"] = "invalid_polling_profiles"
+        if user_input is not None and not errors:
             return self.async_create_entry(
                 title="", 
                 data={
@@ -91,6 +129,20 @@ class XiaomiCloudOptionsFlow(config_entries.OptionsFlow):
                     CONF_LOW_BATTERY_POLLING: user_input.get("启用低电量快速更新"),
                     CONF_LOW_BATTERY_THRESHOLD: user_input.get("低电量阈值 (%)"),
                     CONF_LOW_BATTERY_INTERVAL: user_input.get("低电量更新间隔 (分钟)"),
+                    CONF_FETCH_CONCURRENCY: user_input.get("设备请求并发数"),
+                    CONF_ADAPTIVE_FIX_WAIT: user_input.get("启用自适应定位等待"),
+                    CONF_FIX_WAIT_TIMEOUT: user_input.get("定位等待超时 (秒)"),
+                    CONF_FIX_FRESHNESS: user_input.get("定位新鲜度窗口 (秒，0为总是查找)"),
+                    CONF_POLLING_PROFILES: user_input.get("轮询时段规则"),
+                    CONF_XIAOMI_RATE_LIMIT: user_input.get("小米云每秒请求上限"),
+                    CONF_XIAOMI_BURST: user_input.get("小米云突发请求数"),
+                    CONF_GEOCODE_PRECISION: user_input.get("地址缓存精度 (geohash位数)"),
+                    CONF_GEOCODE_CACHE_TTL: user_input.get("地址缓存有效期 (天)"),
+                    CONF_ADDRESS_MIN_DISTANCE: user_input.get("地址更新最小位移 (米)"),
+                    CONF_GAODE_DAILY_LIMIT: user_input.get("高德API每日调用上限"),
+                    CONF_GAODE_QPS: user_input.get("高德API每秒请求上限"),
+                    CONF_OFFLINE_GEOCODER: user_input.get("离线地址解析"),
+                    CONF_OFFLINE_DATASET: user_input.get("离线地址数据文件"),
                 }
             )
 
@@ -119,6 +171,65 @@ class XiaomiCloudOptionsFlow(config_entries.OptionsFlow):
             CONF_LOW_BATTERY_INTERVAL,
             self._config_entry.data.get(CONF_LOW_BATTERY_INTERVAL, DEFAULT_LOW_BATTERY_INTERVAL)
         )
+        fetch_concurrency = self._config_entry.options.get(
+            CONF_FETCH_CONCURRENCY,
+            self._config_entry.data.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY)
+        )
+        adaptive_fix_wait = self._config_entry.options.get(
+            CONF_ADAPTIVE_FIX_WAIT,
+            self._config_entry.data.get(CONF_ADAPTIVE_FIX_WAIT, DEFAULT_ADAPTIVE_FIX_WAIT)
+        )
+        fix_wait_timeout = self._config_entry.options.get(
+            CONF_FIX_WAIT_TIMEOUT,
+            self._config_entry.data.get(CONF_FIX_WAIT_TIMEOUT, DEFAULT_FIX_WAIT_TIMEOUT)
+        )
+        fix_freshness = self._config_entry.options.get(
+            CONF_FIX_FRESHNESS,
+            self._config_entry.data.get(CONF_FIX_FRESHNESS, DEFAULT_FIX_FRESHNESS)
+        )
+        polling_profiles = self._config_entry.options.get(
+            CONF_POLLING_PROFILES,
+            self._config_entry.data.get(CONF_POLLING_PROFILES, DEFAULT_POLLING_PROFILES)
+        )
+        xiaomi_rate_limit = self._config_entry.options.get(
+            CONF_XIAOMI_RATE_LIMIT,
+            self._config_entry.data.get(CONF_XIAOMI_RATE_LIMIT, DEFAULT_XIAOMI_RATE_LIMIT)
+        )
+        xiaomi_burst = self._config_entry.options.get(
+            CONF_XIAOMI_BURST,
+            self._config_entry.data.get(CONF_XIAOMI_BURST, DEFAULT_XIAOMI_BURST)
+        )
+        if errors:
+            # 保留用户输入的规则以便修改
+            polling_profiles = user_input.get("轮询时段规则", polling_profiles)
+        geocode_precision = self._config_entry.options.get(
+            CONF_GEOCODE_PRECISION,
+            self._config_entry.data.get(CONF_GEOCODE_PRECISION, DEFAULT_GEOCODE_PRECISION)
+        )
+        geocode_cache_ttl = self._config_entry.options.get(
+            CONF_GEOCODE_CACHE_TTL,
+            self._config_entry.data.get(CONF_GEOCODE_CACHE_TTL, DEFAULT_GEOCODE_CACHE_TTL)
+        )
+        address_min_distance = self._config_entry.options.get(
+            CONF_ADDRESS_MIN_DISTANCE,
+            self._config_entry.data.get(CONF_ADDRESS_MIN_DISTANCE, DEFAULT_ADDRESS_MIN_DISTANCE)
+        )
+        gaode_daily_limit = self._config_entry.options.get(
+            CONF_GAODE_DAILY_LIMIT,
+            self._config_entry.data.get(CONF_GAODE_DAILY_LIMIT, DEFAULT_GAODE_DAILY_LIMIT)
+        )
+        gaode_qps = self._config_entry.options.get(
+            CONF_GAODE_QPS,
+            self._config_entry.data.get(CONF_GAODE_QPS, DEFAULT_GAODE_QPS)
+        )
+        offline_geocoder = self._config_entry.options.get(
+            CONF_OFFLINE_GEOCODER,
+            self._config_entry.data.get(CONF_OFFLINE_GEOCODER, DEFAULT_OFFLINE_GEOCODER)
+        )
+        offline_dataset = self._config_entry.options.get(
+            CONF_OFFLINE_DATASET,
+            self._config_entry.data.get(CONF_OFFLINE_DATASET, DEFAULT_OFFLINE_DATASET)
+        )
 
         # 定义坐标系类型选项
         coordinate_types = {
@@ -127,6 +238,13 @@ class XiaomiCloudOptionsFlow(config_entries.OptionsFlow):
             CONF_COORDINATE_TYPE_BAIDU: "百度坐标"
         }
 
+        # 定义离线地址解析模式选项
+        offline_geocoder_modes = {
+            OFFLINE_GEOCODER_DISABLED: "不使用",
+            OFFLINE_GEOCODER_FALLBACK: "高德不可用时使用",
+            OFFLINE_GEOCODER_PRIMARY: "只使用离线数据",
+        }
+
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
@@ -155,8 +273,65 @@ class XiaomiCloudOptionsFlow(config_entries.OptionsFlow):
                         "低电量更新间隔 (分钟)",
                         default=low_battery_interval
                     ): cv.positive_int,
+                    vol.Optional(
+                        "设备请求并发数",
+                        default=fetch_concurrency
+                    ): vol.All(cv.positive_int, vol.Range(min=1, max=10)),
+                    vol.Optional(
+                        "启用自适应定位等待",
+                        default=adaptive_fix_wait
+                    ): cv.boolean,
+                    vol.Optional(
+                        "定位等待超时 (秒)",
+                        default=fix_wait_timeout
+                    ): vol.All(cv.positive_int, vol.Range(min=5, max=120)),
+                    vol.Optional(
+                        "定位新鲜度窗口 (秒，0为总是查找)",
+                        default=fix_freshness
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        "轮询时段规则",
+                        default=polling_profiles
+                    ): str,
+                    vol.Optional(
+                        "小米云每秒请求上限",
+                        default=xiaomi_rate_limit
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=20)),
+                    vol.Optional(
+                        "小米云突发请求数",
+                        default=xiaomi_burst
+                    ): vol.All(cv.positive_int, vol.Range(min=2, max=50)),
+                    vol.Optional(
+                        "地址缓存精度 (geohash位数)",
+                        default=geocode_precision
+                    ): vol.All(cv.positive_int, vol.Range(min=5, max=9)),
+                    vol.Optional(
+                        "地址缓存有效期 (天)",
+                        default=geocode_cache_ttl
+                    ): cv.positive_int,
+                    vol.Optional(
+                        "地址更新最小位移 (米)",
+                        default=address_min_distance
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        "高德API每日调用上限",
+                        default=gaode_daily_limit
+                    ): vol.All(cv.positive_int, vol.Range(min=1)),
+                    vol.Optional(
+                        "高德API每秒请求上限",
+                        default=gaode_qps
+                    ): vol.All(cv.positive_int, vol.Range(min=1)),
+                    vol.Optional(
+                        "离线地址解析",
+                        default=offline_geocoder
+                    ): vol.In(offline_geocoder_modes),
+                    vol.Optional(
+                        "离线地址数据文件",
+                        default=offline_dataset
+                    ): str,
                 }
             ),
+            errors=errors,
         )
 
 # 如果有其他步骤或方法，放在这里...
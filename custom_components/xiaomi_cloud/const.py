@@ -14,6 +14,9 @@ DOMAIN = "xiaomi_cloud"
 COORDINATOR = "coordinator"
 DATA_LISTENER = "listener"
 UNDO_UPDATE_LISTENER = "undo_update_listener"
+GAODE_CLIENT = "gaode_client"
+ADDRESS_RESOLVER = "address_resolver"
+OPTIONS_SNAPSHOT = "options_snapshot"
 DEFAULT_SCAN_INTERVAL = 660
 DEFAULT_WAKE_ON_START = False
 MIN_SCAN_INTERVAL = 60
@@ -32,3 +35,34 @@ DEFAULT_LOW_BATTERY_THRESHOLD = 40  # 默认40%为低电量
 CONF_LOW_BATTERY_INTERVAL = "low_battery_interval"  # 低电量时的更新间隔
 DEFAULT_LOW_BATTERY_INTERVAL = 10  # 默认低电量时10分钟更新一次
 
+CONF_FETCH_CONCURRENCY = "fetch_concurrency"  # 并发请求设备数
+DEFAULT_FETCH_CONCURRENCY = 4  # 默认同时请求4个设备
+CONF_ADAPTIVE_FIX_WAIT = "enable_adaptive_fix_wait"  # 启用自适应定位等待
+DEFAULT_ADAPTIVE_FIX_WAIT = False  # 默认固定等待15秒
+CONF_FIX_WAIT_TIMEOUT = "fix_wait_timeout"  # 自适应等待新定位的最长时间
+DEFAULT_FIX_WAIT_TIMEOUT = 30  # 默认最多等待30秒
+CONF_FIX_FRESHNESS = "fix_freshness"  # 定位新鲜度窗口，云端定位在该时间内时不发送查找命令
+DEFAULT_FIX_FRESHNESS = 0  # 默认0秒，总是发送查找命令
+CONF_XIAOMI_RATE_LIMIT = "xiaomi_rate_limit"  # 小米云每秒请求上限（按账号）
+DEFAULT_XIAOMI_RATE_LIMIT = 2
+CONF_XIAOMI_BURST = "xiaomi_burst"  # 小米云允许的突发请求数
+DEFAULT_XIAOMI_BURST = 5
+CONF_POLLING_PROFILES = "polling_profiles"  # 按时段/星期切换更新间隔的规则，格式见profiles.py
+DEFAULT_POLLING_PROFILES = ""
+CONF_GEOCODE_PRECISION = "geocode_cache_precision"  # 地址缓存的geohash精度
+DEFAULT_GEOCODE_PRECISION = 7  # 默认7位，约150米网格
+CONF_GEOCODE_CACHE_TTL = "geocode_cache_ttl"  # 地址缓存有效期
+DEFAULT_GEOCODE_CACHE_TTL = 30  # 默认30天
+CONF_ADDRESS_MIN_DISTANCE = "address_min_distance"  # 重新解析地址的最小位移
+DEFAULT_ADDRESS_MIN_DISTANCE = 50  # 默认50米
+CONF_GAODE_DAILY_LIMIT = "gaode_daily_limit"  # 高德API每日调用上限
+DEFAULT_GAODE_DAILY_LIMIT = 5000  # 个人开发者逆地理编码默认每日5000次
+CONF_GAODE_QPS = "gaode_qps"  # 高德API每秒请求上限
+DEFAULT_GAODE_QPS = 3
+CONF_OFFLINE_GEOCODER = "offline_geocoder"  # 离线地址解析模式
+OFFLINE_GEOCODER_DISABLED = "disabled"  # 不使用离线解析
+OFFLINE_GEOCODER_FALLBACK = "fallback"  # 高德不可用时使用离线解析
+OFFLINE_GEOCODER_PRIMARY = "primary"  # 只使用离线解析
+DEFAULT_OFFLINE_GEOCODER = OFFLINE_GEOCODER_DISABLED
+CONF_OFFLINE_DATASET = "offline_dataset"  # 自定义离线数据文件路径，留空使用内置数据
+DEFAULT_OFFLINE_DATASET = ""
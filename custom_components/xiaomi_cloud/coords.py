@@ -0,0 +1,197 @@
+"""WGS84 / GCJ-02 / BD-09 坐标系转换.
+
+所有函数的参数顺序均为(经度, 纬度).
+中国大陆范围以外的坐标不做GCJ-02偏移，原样返回.
+"""
+import math
+
+# 克拉索夫斯基椭球参数
+KRASOVSKY_A = 6378245.0  # 长半轴
+KRASOVSKY_EE = 0.00669342162296594323  # 第一偏心率平方
+BD_X_PI = math.pi * 3000.0 / 180.0
+
+EARTH_RADIUS = 6371008.8  # 地球平均半径（米）
+
+DEFAULT_TOLERANCE = 1e-7  # GCJ-02精确反算的收敛阈值（度，约1厘米）
+DEFAULT_MAX_ITERATIONS = 10
+
+# 中国大陆范围，多边形顶点为(经度, 纬度)，由常用的矩形区域拼接而成
+CHINA_POLYGONS = [
+    [(79.4462, 49.2204), (96.3304, 49.2204), (96.3304, 42.8899), (79.4462, 42.8899)],
+    [(109.6872, 54.1415), (135.0002, 54.1415), (135.0002, 39.3742), (109.6872, 39.3742)],
+    [(73.1246, 42.8899), (124.1436, 42.8899), (124.1436, 29.5297), (73.1246, 29.5297)],
+    [(82.9684, 29.5297), (97.0352, 29.5297), (97.0352, 26.7186), (82.9684, 26.7186)],
+    [(97.0253, 29.5297), (124.3671, 29.5297), (124.3671, 20.4186), (97.0253, 20.4186)],
+    [(107.9750, 20.4186), (111.6800, 20.4186), (111.6800, 17.9343), (107.9750, 17.9343)],
+]
+# 上述区域中需要排除的部分（台湾及周边国家）
+CHINA_EXCLUDE_POLYGONS = [
+    [(119.9215, 25.3980), (122.0052, 25.3980), (122.0052, 21.8073), (119.9215, 21.8073)],
+    [(101.8652, 22.8454), (106.6645, 22.8454), (106.6645, 20.4861), (101.8652, 20.4861)],
+    [(106.4525, 21.5428), (108.0511, 21.5428), (108.0511, 20.4869), (106.4525, 20.4869)],
+    [(109.0323, 55.8175), (119.1276, 55.8175), (119.1276, 50.3257), (109.0323, 50.3257)],
+    [(127.4566, 55.8175), (137.0227, 55.8175), (137.0227, 49.5574), (127.4566, 49.5574)],
+    [(131.2662, 44.8927), (137.0227, 44.8927), (137.0227, 42.5692), (131.2662, 42.5692)],
+]
+
+
+def _point_in_polygon(lon, lat, polygon):
+    """射线法判断点是否在多边形内."""
+    inside = False
+    x1, y1 = polygon[-1]
+    for x2, y2 in polygon:
+        if (y1 > lat) != (y2 > lat) and lon < (x2 - x1) * (lat - y1) / (y2 - y1) + x1:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _in_china_exact(lon, lat):
+    """按多边形精确判断坐标是否在中国大陆范围内."""
+    return (any(_point_in_polygon(lon, lat, polygon) for polygon in CHINA_POLYGONS)
+            and not any(_point_in_polygon(lon, lat, polygon) for polygon in CHINA_EXCLUDE_POLYGONS))
+
+
+# 按1度网格预先分类：完全在范围内、完全在范围外、或与边界相交需要精确判断
+_CELL_OUTSIDE = 0
+_CELL_INSIDE = 1
+_CELL_BOUNDARY = 2
+
+
+def _build_grid():
+    polygons = CHINA_POLYGONS + CHINA_EXCLUDE_POLYGONS
+    lon_min = math.floor(min(x for polygon in polygons for x, _ in polygon))
+    lon_max = math.floor(max(x for polygon in polygons for x, _ in polygon))
+    lat_min = math.floor(min(y for polygon in polygons for _, y in polygon))
+    lat_max = math.floor(max(y for polygon in polygons for _, y in polygon))
+    width = lon_max - lon_min + 1
+    height = lat_max - lat_min + 1
+
+    boundary = set()
+    for polygon in polygons:
+        x1, y1 = polygon[-1]
+        for x2, y2 in polygon:
+            # 边的外包矩形覆盖的网格都标记为边界网格
+            for col in range(math.floor(min(x1, x2)) - lon_min, math.floor(max(x1, x2)) - lon_min + 1):
+                for row in range(math.floor(min(y1, y2)) - lat_min, math.floor(max(y1, y2)) - lat_min + 1):
+                    boundary.add((row, col))
+            x1, y1 = x2, y2
+
+    cells = []
+    for row in range(height):
+        for col in range(width):
+            if (row, col) in boundary:
+                cells.append(_CELL_BOUNDARY)
+            elif _in_china_exact(lon_min + col + 0.5, lat_min + row + 0.5):
+                cells.append(_CELL_INSIDE)
+            else:
+                cells.append(_CELL_OUTSIDE)
+    return lon_min, lat_min, width, height, cells
+
+
+_GRID_LON_MIN, _GRID_LAT_MIN, _GRID_WIDTH, _GRID_HEIGHT, _GRID_CELLS = _build_grid()
+
+
+def out_of_china(lon, lat):
+    """判断坐标是否在中国大陆范围以外，大部分坐标只需一次网格查表."""
+    col = math.floor(lon) - _GRID_LON_MIN
+    row = math.floor(lat) - _GRID_LAT_MIN
+    if not (0 <= col < _GRID_WIDTH and 0 <= row < _GRID_HEIGHT):
+        return True
+    cell = _GRID_CELLS[row * _GRID_WIDTH + col]
+    if cell == _CELL_BOUNDARY:
+        return not _in_china_exact(lon, lat)
+    return cell == _CELL_OUTSIDE
+
+
+def _gcj02_delta(lon, lat):
+    """计算WGS84坐标加偏到GCJ-02的经纬度偏移量."""
+    x = lon - 105.0
+    y = lat - 35.0
+    sqrt_abs_x = math.sqrt(abs(x))
+    # 经纬度偏移共用的正弦项
+    common = (20.0 * math.sin(6.0 * x * math.pi) + 20.0 * math.sin(2.0 * x * math.pi)) * 2.0 / 3.0
+
+    dlat = -100.0 + 2.0 * x + 3.0 * y + 0.2 * y * y + 0.1 * x * y + 0.2 * sqrt_abs_x + common
+    dlat += (20.0 * math.sin(y * math.pi) + 40.0 * math.sin(y / 3.0 * math.pi)) * 2.0 / 3.0
+    dlat += (160.0 * math.sin(y / 12.0 * math.pi) + 320.0 * math.sin(y * math.pi / 30.0)) * 2.0 / 3.0
+
+    dlon = 300.0 + x + 2.0 * y + 0.1 * x * x + 0.1 * x * y + 0.1 * sqrt_abs_x + common
+    dlon += (20.0 * math.sin(x * math.pi) + 40.0 * math.sin(x / 3.0 * math.pi)) * 2.0 / 3.0
+    dlon += (150.0 * math.sin(x / 12.0 * math.pi) + 300.0 * math.sin(x / 30.0 * math.pi)) * 2.0 / 3.0
+
+    radlat = lat / 180.0 * math.pi
+    magic = 1 - KRASOVSKY_EE * math.sin(radlat) ** 2
+    sqrtmagic = math.sqrt(magic)
+    dlat = (dlat * 180.0) / ((KRASOVSKY_A * (1 - KRASOVSKY_EE)) / (magic * sqrtmagic) * math.pi)
+    dlon = (dlon * 180.0) / (KRASOVSKY_A / sqrtmagic * math.cos(radlat) * math.pi)
+    return dlon, dlat
+
+
+def wgs84_to_gcj02(lon, lat):
+    """WGS84转GCJ-02."""
+    if out_of_china(lon, lat):
+        return lon, lat
+    dlon, dlat = _gcj02_delta(lon, lat)
+    return lon + dlon, lat + dlat
+
+
+def gcj02_to_wgs84(lon, lat):
+    """GCJ-02转WGS84（单步近似，误差约1-2米）."""
+    if out_of_china(lon, lat):
+        return lon, lat
+    dlon, dlat = _gcj02_delta(lon, lat)
+    return lon - dlon, lat - dlat
+
+
+def gcj02_to_wgs84_exact(lon, lat, tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """GCJ-02转WGS84，迭代修正直到正向加偏结果与输入相差不超过tolerance度."""
+    if out_of_china(lon, lat):
+        return lon, lat
+    wgs_lon, wgs_lat = gcj02_to_wgs84(lon, lat)
+    for _ in range(max_iterations):
+        dlon, dlat = _gcj02_delta(wgs_lon, wgs_lat)
+        err_lon = wgs_lon + dlon - lon
+        err_lat = wgs_lat + dlat - lat
+        if abs(err_lon) <= tolerance and abs(err_lat) <= tolerance:
+            break
+        wgs_lon -= err_lon
+        wgs_lat -= err_lat
+    return wgs_lon, wgs_lat
+
+
+def gcj02_to_bd09(lon, lat):
+    """GCJ-02转BD-09."""
+    z = math.sqrt(lon * lon + lat * lat) + 0.00002 * math.sin(lat * BD_X_PI)
+    theta = math.atan2(lat, lon) + 0.000003 * math.cos(lon * BD_X_PI)
+    return z * math.cos(theta) + 0.0065, z * math.sin(theta) + 0.006
+
+
+def bd09_to_gcj02(lon, lat):
+    """BD-09转GCJ-02."""
+    x = lon - 0.0065
+    y = lat - 0.006
+    z = math.sqrt(x * x + y * y) - 0.00002 * math.sin(y * BD_X_PI)
+    theta = math.atan2(y, x) - 0.000003 * math.cos(x * BD_X_PI)
+    return z * math.cos(theta), z * math.sin(theta)
+
+
+def wgs84_to_bd09(lon, lat):
+    """WGS84转BD-09."""
+    return gcj02_to_bd09(*wgs84_to_gcj02(lon, lat))
+
+
+def bd09_to_wgs84(lon, lat, tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """BD-09转WGS84."""
+    return gcj02_to_wgs84_exact(*bd09_to_gcj02(lon, lat), tolerance, max_iterations)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """计算两点间的大圆距离（米）."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
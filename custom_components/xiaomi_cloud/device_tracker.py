@@ -4,7 +4,7 @@ import logging
 from homeassistant.components.device_tracker.config_entry import SourceType
 from homeassistant.components.device_tracker.config_entry import TrackerEntity
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.device_registry import DeviceEntryType
 
@@ -13,54 +13,79 @@ from .const import (
     COORDINATOR,
     SIGNAL_STATE_UPDATED
 )
+from .models import format_timestamp
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# Snapshot fields that affect the tracker state or attributes
+TRACKER_FIELDS = (
+    "model", "power", "location", "latitude", "longitude", "accuracy",
+    "coordinate_type", "location_time", "phone",
+)
+
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_entities):
     """Configure a dispatcher connection based on a config entry."""
 
     coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
-    devices = []
-    
-    # Check if coordinator has valid data
-    if not coordinator.data or not isinstance(coordinator.data, list) or len(coordinator.data) == 0:
+    known_imeis = set()
+
+    @callback
+    def async_add_new_devices():
+        """Add entities for IMEIs that are not tracked yet."""
+        data = coordinator.data
+        if not isinstance(data, dict):
+            return
+        devices = []
+        for imei in data:
+            if imei and imei not in known_imeis:
+                known_imeis.add(imei)
+                devices.append(XiaomiDeviceEntity(hass, coordinator, imei))
+                _LOGGER.debug("device is : %s", imei)
+        if devices:
+            async_add_entities(devices, True)
+
+    if not coordinator.data:
         _LOGGER.debug("No device data available yet. Device will be set up when data becomes available.")
-        return
-        
-    for i in range(len(coordinator.data)):
-        devices.append(XiaomiDeviceEntity(hass, coordinator, i))
-        _LOGGER.debug("device is : %s", i)
-    
-    async_add_entities(devices, True)
+    async_add_new_devices()
+    config_entry.async_on_unload(coordinator.async_add_listener(async_add_new_devices))
 
 class XiaomiDeviceEntity(TrackerEntity, RestoreEntity, Entity):
     """Represent a tracked device."""
 
-    def __init__(self, hass, coordinator, vin) -> None:
+    def __init__(self, hass, coordinator, imei) -> None:
         """Set up Geofency entity."""
         self._hass = hass
-        self._vin = vin
-        self.coordinator = coordinator  
-        self._unique_id = coordinator.data[vin]["imei"]    
-        
+        self.coordinator = coordinator
+        device = coordinator.data[imei]
+        self._unique_id = imei
+
         # Format model name to create entity ID in the desired format
-        model = coordinator.data[vin]["model"]
+        model = device.model
         if model:
             # Remove spaces and replace with underscores, remove special characters
             formatted_model = model.replace(" ", "_").lower()
             self._name = formatted_model
         else:
-            self._name = f"xiaomi_device_{vin}"
+            self._name = f"xiaomi_device_{imei}"
             
         self._icon = "mdi:map-marker"
-        self.sw_version = coordinator.data[vin]["version"]
-        self._last_lat = coordinator.data[vin].get("device_lat")
-        self._last_lon = coordinator.data[vin].get("device_lon")
-        self._last_accuracy = coordinator.data[vin].get("device_accuracy")
-        self._last_update_time = coordinator.data[vin].get("device_location_update_time")
-        self._last_coordinate_type = coordinator.data[vin].get("coordinate_type")
-        self._last_device_phone = coordinator.data[vin].get("device_phone")
+        self.sw_version = device.version
+        self._last_lat = device.latitude
+        self._last_lon = device.longitude
+        self._last_accuracy = device.accuracy
+        self._last_update_time = device.location_time
+        self._last_coordinate_type = device.coordinate_type
+        self._last_device_phone = device.phone
+        self._last_location = device.location
+
+    @property
+    def _device(self):
+        """Return the latest snapshot of this device, or None if it is missing."""
+        data = self.coordinator.data
+        if not isinstance(data, dict):
+            return None
+        return data.get(self._unique_id)
 
     async def async_update(self):
         """Update Colorfulclouds entity."""   
@@ -71,70 +96,77 @@ class XiaomiDeviceEntity(TrackerEntity, RestoreEntity, Entity):
 
         _LOGGER.debug("device_tracker_unique_id: %s", self._unique_id)
 
-        async def async_update_state():
-            """Update sensor state."""
-            await self.async_update_ha_state(True)
+        @callback
+        def async_handle_update():
+            """Write state only when this device changed in the update."""
+            if self.coordinator.device_changed(self._unique_id, TRACKER_FIELDS):
+                self.async_write_ha_state()
 
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(async_handle_update)
         )
         
     @property
     def battery_level(self):
         """Return battery value of the device."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not a list or index is out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
+            _LOGGER.debug("No data for device %s", self._unique_id)
             return None
-        return data[self._vin].get("device_power")
+        return device_data.power
 
     @property
-    def device_state_attributes(self):
+    def extra_state_attributes(self):
         """Return device specific attributes."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not a list or index out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
+            _LOGGER.debug("No data for device %s", self._unique_id)
             attrs = {}
             if self._last_update_time:
-                attrs["last_update"] = self._last_update_time
+                attrs["last_update"] = format_timestamp(self._last_update_time)
             if self._last_coordinate_type:
                 attrs["coordinate_type"] = self._last_coordinate_type
             if self._last_device_phone:
                 attrs["device_phone"] = self._last_device_phone
+            if self._last_location:
+                attrs.update(self._last_location.as_attributes())
             attrs["imei"] = self._unique_id
             return attrs
-            
-        device_data = data[self._vin]
+
         attrs = {}
-        update_time = device_data.get("device_location_update_time")
+        update_time = device_data.location_time
         if update_time:
-            attrs["last_update"] = update_time
+            attrs["last_update"] = format_timestamp(update_time)
             self._last_update_time = update_time
-        
-        coordinate_type = device_data.get("coordinate_type")
+
+        coordinate_type = device_data.coordinate_type
         if coordinate_type:
             attrs["coordinate_type"] = coordinate_type
             self._last_coordinate_type = coordinate_type
             
-        device_phone = device_data.get("device_phone")
+        device_phone = device_data.phone
         if device_phone:
             attrs["device_phone"] = device_phone
             self._last_device_phone = device_phone
-            
-        attrs["imei"] = device_data.get("imei", self._unique_id)
+
+        # Coordinates in all three systems were already converted when the data was fetched
+        location = device_data.location
+        if location:
+            attrs.update(location.as_attributes())
+            self._last_location = location
+
+        attrs["imei"] = device_data.imei or self._unique_id
 
         return attrs
 
     @property
     def latitude(self):
         """Return latitude value of the device."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not list or index out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
             return self._last_lat
 
-        device_data = data[self._vin]
-        lat = device_data.get("device_lat")
+        lat = device_data.latitude
         if lat is None:
             return self._last_lat
         self._last_lat = lat
@@ -143,13 +175,11 @@ class XiaomiDeviceEntity(TrackerEntity, RestoreEntity, Entity):
     @property
     def longitude(self):
         """Return longitude value of the device."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not a list or index out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
             return self._last_lon
 
-        device_data = data[self._vin]
-        lon = device_data.get("device_lon")
+        lon = device_data.longitude
         if lon is None:
             return self._last_lon
         self._last_lon = lon
@@ -158,12 +188,11 @@ class XiaomiDeviceEntity(TrackerEntity, RestoreEntity, Entity):
     @property
     def location_accuracy(self):
         """Return the gps accuracy of the device."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not a list or index out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
             return self._last_accuracy
-            
-        accuracy = data[self._vin].get("device_accuracy")
+
+        accuracy = device_data.accuracy
         if accuracy is not None:
             self._last_accuracy = accuracy
         return self._last_accuracy
@@ -176,12 +205,11 @@ class XiaomiDeviceEntity(TrackerEntity, RestoreEntity, Entity):
     @property
     def name(self):
         """Return the name of the device."""
-        data = self.coordinator.data
-        if not isinstance(data, list) or self._vin >= len(data):
-            _LOGGER.debug("coordinator.data is not a list or index out of range: %s", data)
+        device_data = self._device
+        if device_data is None:
             return self._name
-            
-        model = data[self._vin].get("model")
+
+        model = device_data.model
         if model:
             # Format model name according to requirements
             formatted_model = model.replace(" ", "_").lower()
@@ -0,0 +1,18 @@
+"""小米云服务诊断信息."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+from .const import CONF_GAODE_APIKEY, COORDINATOR, DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, CONF_GAODE_APIKEY}
+
+
+async def async_get_config_entry_diagnostics(hass, config_entry):
+    """返回配置入口的诊断信息，包括小米云请求层的熔断状态和请求计数."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
+    return {
+        "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "device_count": len(coordinator.data or {}),
+        "requests": coordinator.requester.as_dict(),
+    }
@@ -0,0 +1,199 @@
+"""高德地图逆地理编码客户端."""
+import datetime
+import logging
+
+import async_timeout
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .ratelimit import TokenBucket
+
+_LOGGER = logging.getLogger(__name__)
+
+GAODE_REGEO_URL = "https://restapi.amap.com/v3/geocode/regeo"
+GAODE_TIMEOUT = 10  # 单次请求超时（秒）
+GAODE_BATCH_SIZE = 20  # batch模式单次最多20个坐标
+
+# 高德按北京时间每日0点重置调用量
+GAODE_TIMEZONE = datetime.timezone(datetime.timedelta(hours=8))
+QUOTA_STORAGE_VERSION = 1
+QUOTA_STORAGE_KEY = f"{DOMAIN}.gaode_quota"
+QUOTA_SAVE_DELAY = 30
+QUOTA_RESERVE_RATIO = 0.1  # 剩余额度低于该比例时只处理高优先级请求
+# 表示超出调用量或频率限制的infocode
+QUOTA_EXCEEDED_INFOCODES = ("10003", "10044")
+RATE_LIMITED_INFOCODES = ("10004", "10014", "10019", "10020", "10021")
+
+# 解析优先级
+PRIORITY_HIGH = "high"  # 设备尚无有效地址
+PRIORITY_NORMAL = "normal"  # 位置变化后的常规刷新
+
+
+class GaodeError(Exception):
+    """高德API调用失败，state为展示给用户的状态文字."""
+
+    def __init__(self, state, message=None):
+        """初始化异常."""
+        super().__init__(message or state)
+        self.state = state
+
+
+class GaodeQuotaExceeded(GaodeError):
+    """当日额度不足或请求被限流，调用方应保留原地址."""
+
+
+class GaodeQuota:
+    """按北京时间自然日统计API调用次数，并持久化到 .storage."""
+
+    def __init__(self, hass, entry_id, daily_limit):
+        """初始化额度统计."""
+        self._store = Store(hass, QUOTA_STORAGE_VERSION, f"{QUOTA_STORAGE_KEY}.{entry_id}")
+        self.daily_limit = int(daily_limit)
+        self._date = self._today()
+        self._used = 0
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(GAODE_TIMEZONE).date().isoformat()
+
+    def _roll(self):
+        """跨天时重置计数."""
+        today = self._today()
+        if today != self._date:
+            self._date = today
+            self._used = 0
+
+    async def async_load(self):
+        """加载当天已用次数."""
+        stored = await self._store.async_load()
+        if stored and stored.get("date") == self._today():
+            self._used = int(stored.get("used", 0))
+
+    @property
+    def used(self):
+        """当天已用次数."""
+        self._roll()
+        return self._used
+
+    @property
+    def remaining(self):
+        """当天剩余次数."""
+        return max(0, self.daily_limit - self.used)
+
+    def allows(self, priority):
+        """判断当前额度下是否允许该优先级的请求."""
+        remaining = self.remaining
+        if remaining <= 0:
+            return False
+        if priority != PRIORITY_HIGH and remaining <= self.daily_limit * QUOTA_RESERVE_RATIO:
+            return False
+        return True
+
+    def record(self, count=1):
+        """记录调用次数."""
+        self._roll()
+        self._used += count
+        self._store.async_delay_save(self._data_to_save, QUOTA_SAVE_DELAY)
+
+    def exhaust(self):
+        """API返回额度已用完时，将当天计数置满."""
+        self._roll()
+        self._used = max(self._used, self.daily_limit)
+        self._store.async_delay_save(self._data_to_save, QUOTA_SAVE_DELAY)
+
+    def _data_to_save(self):
+        return {"date": self._date, "used": self._used}
+
+    async def async_remove(self):
+        """删除持久化的计数."""
+        await self._store.async_remove()
+
+
+class GaodeClient:
+    """高德逆地理编码客户端，使用Home Assistant共享的HTTP会话."""
+
+    def __init__(self, hass, api_key, cache=None, quota=None, qps=None):
+        """初始化客户端.
+
+        cache为可选的GeocodeCache，quota为可选的GaodeQuota，qps为每秒请求上限.
+        """
+        self._hass = hass
+        self.api_key = api_key
+        self._cache = cache
+        self.quota = quota
+        self._bucket = TokenBucket(qps) if qps else None
+
+    async def async_regeo_batch(self, points, priority=PRIORITY_NORMAL):
+        """批量逆地理编码GCJ-02坐标列表[(lon, lat), ...].
+
+        先查询缓存，未命中的坐标每GAODE_BATCH_SIZE个合并为一次batch请求.
+        返回与points顺序一致的地址列表，无法解析的位置为None；
+        请求失败时抛出GaodeError，额度不足以支持该优先级时抛出GaodeQuotaExceeded.
+        """
+        results = [None] * len(points)
+        pending = []
+        for index, (gcj_lon, gcj_lat) in enumerate(points):
+            address = self._cache.get(gcj_lon, gcj_lat) if self._cache is not None else None
+            if address is not None:
+                results[index] = address
+            else:
+                pending.append(index)
+
+        if len(pending) < len(points):
+            _LOGGER.debug("地址缓存命中%d个，需要请求%d个", len(points) - len(pending), len(pending))
+
+        for start in range(0, len(pending), GAODE_BATCH_SIZE):
+            chunk = pending[start:start + GAODE_BATCH_SIZE]
+            addresses = await self._async_request_regeo(
+                [points[index] for index in chunk], priority)
+            for index, address in zip(chunk, addresses):
+                results[index] = address
+                if address and self._cache is not None:
+                    self._cache.set(*points[index], address)
+        return results
+
+    async def _async_request_regeo(self, points, priority):
+        """发送一次regeo请求，多个坐标时使用batch模式."""
+        if self.quota is not None and not self.quota.allows(priority):
+            raise GaodeQuotaExceeded("高德API额度不足",
+                                     f"高德API当日剩余额度{self.quota.remaining}次，跳过{priority}优先级请求")
+        if self._bucket is not None:
+            await self._bucket.acquire()
+
+        params = {
+            "location": "|".join(f"{gcj_lon:.6f},{gcj_lat:.6f}" for gcj_lon, gcj_lat in points),
+            "key": self.api_key,
+            "radius": 1000,  # 搜索半径
+            "extensions": "base",  # 返回基本信息
+            "batch": "true" if len(points) > 1 else "false",
+        }
+        session = async_get_clientsession(self._hass)
+        async with async_timeout.timeout(GAODE_TIMEOUT):
+            async with session.get(GAODE_REGEO_URL, params=params) as resp:
+                if resp.status != 200:
+                    raise GaodeError(f"高德API请求失败({resp.status})",
+                                     f"高德API请求失败，HTTP状态码: {resp.status}")
+                js = await resp.json(content_type=None)
+        if self.quota is not None:
+            self.quota.record()
+
+        if js.get("status") != "1":  # 1表示成功
+            infocode = str(js.get("infocode"))
+            if infocode in QUOTA_EXCEEDED_INFOCODES:
+                if self.quota is not None:
+                    self.quota.exhaust()
+                raise GaodeQuotaExceeded("高德API额度不足", f"高德API当日额度已用完: {js.get('info')}")
+            if infocode in RATE_LIMITED_INFOCODES:
+                raise GaodeQuotaExceeded("高德API额度不足", f"高德API请求过于频繁: {js.get('info')}")
+            raise GaodeError("高德API返回错误",
+                             f"高德API返回错误，状态码: {js.get('status')}, 信息: {js.get('info')}")
+
+        if len(points) > 1:
+            regeocodes = js.get("regeocodes") or []
+        else:
+            regeocodes = [js.get("regeocode") or {}]
+        # 没有地址时高德返回空列表而不是字符串
+        addresses = [item.get("formatted_address") or None for item in regeocodes]
+        addresses += [None] * (len(points) - len(addresses))
+        return addresses
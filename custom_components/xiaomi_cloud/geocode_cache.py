@@ -0,0 +1,107 @@
+"""按geohash量化坐标的逆地理编码持久化缓存."""
+from collections import OrderedDict
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.geocode_cache"
+SAVE_DELAY = 60  # 合并写盘的延迟（秒）
+MAX_ENTRIES = 2000
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lon, precision):
+    """将坐标编码为指定长度的geohash."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+class GeocodeCache:
+    """GCJ-02坐标到地址的缓存，带TTL和LRU淘汰，并持久化到 .storage."""
+
+    def __init__(self, hass, entry_id, precision, ttl_days):
+        """初始化缓存."""
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}")
+        self.precision = int(precision)
+        self._ttl = int(ttl_days) * 86400
+        self._entries = OrderedDict()  # geohash -> [地址, 过期时间戳]
+        self.hits = 0
+        self.misses = 0
+
+    async def async_load(self):
+        """从存储加载未过期的缓存项."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        now_ts = time.time()
+        for geohash, (address, expires_at) in stored.get("entries", {}).items():
+            if expires_at > now_ts:
+                self._entries[geohash] = [address, expires_at]
+        _LOGGER.debug("已加载%d条地址缓存", len(self._entries))
+
+    def _key(self, gcj_lon, gcj_lat):
+        return geohash_encode(gcj_lat, gcj_lon, self.precision)
+
+    def get(self, gcj_lon, gcj_lat):
+        """查找坐标所在网格的地址，未命中或已过期时返回None."""
+        key = self._key(gcj_lon, gcj_lat)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, gcj_lon, gcj_lat, address):
+        """写入坐标所在网格的地址."""
+        key = self._key(gcj_lon, gcj_lat)
+        self._entries[key] = [address, time.time() + self._ttl]
+        self._entries.move_to_end(key)
+        while len(self._entries) > MAX_ENTRIES:
+            self._entries.popitem(last=False)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self):
+        return {"entries": dict(self._entries)}
+
+    async def async_remove(self):
+        """删除持久化的缓存."""
+        await self._store.async_remove()
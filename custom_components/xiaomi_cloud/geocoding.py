@@ -0,0 +1,219 @@
+"""地址解析阶段：每次协调器更新后统一为所有设备解析地址."""
+import asyncio
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DOMAIN,
+    OFFLINE_GEOCODER_DISABLED,
+    OFFLINE_GEOCODER_PRIMARY,
+)
+from .coords import haversine
+from .gaode import GaodeError, GaodeQuotaExceeded, PRIORITY_HIGH, PRIORITY_NORMAL
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGNAL_ADDRESS_UPDATED = f"{DOMAIN}.address_updated.{{}}"
+
+# 解析失败或被推迟后重新解析的等待时间（秒）；协调器数据不变时不会通知监听者，需要单独的定时器
+RETRY_DELAY = 300
+
+# 出错时显示的状态文字，出现这些状态时不视为已有有效地址
+ERROR_STATES = ["无法获取位置", "地址获取异常", "高德API返回错误", "高德API请求失败", "地址解析失败", "坐标格式错误", "高德API额度不足", "离线数据未覆盖该位置"]
+
+
+class AddressResolver:
+    """每次协调器更新运行一次，收集位置变化的设备并合并为一次batch请求.
+
+    解析结果按IMEI保存，完成后通过SIGNAL_ADDRESS_UPDATED通知地址传感器.
+    相对上次解析位置的位移小于max(min_distance, 定位精度)时保留原地址，不调用API.
+    配置离线解析器时，primary模式只使用离线数据，fallback模式在高德不可用时使用.
+    """
+
+    def __init__(self, hass, entry_id, coordinator, gaode_client, min_distance=0,
+                 offline_geocoder=None, offline_mode=OFFLINE_GEOCODER_DISABLED):
+        """初始化地址解析阶段."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._gaode_client = gaode_client
+        self.signal = SIGNAL_ADDRESS_UPDATED.format(entry_id)
+        self._states = {}  # imei -> 地址或状态文字
+        self._last_update_time = {}  # imei -> 上次解析时的位置更新时间
+        self._last_position = {}  # imei -> 上次解析地址时的(lat, lon)
+        self.min_distance = min_distance  # 重新解析地址的最小位移（米）
+        self._offline_geocoder = offline_geocoder
+        self._offline_mode = offline_mode if offline_geocoder is not None else OFFLINE_GEOCODER_DISABLED
+        self._fallback_imeis = set()  # 当前地址来自离线兜底的设备，重试时重新请求高德
+        self._lock = asyncio.Lock()
+        self._unsub_retry = None
+
+    def get(self, imei):
+        """返回设备当前的地址状态."""
+        return self._states.get(imei)
+
+    @callback
+    def async_start(self):
+        """开始监听协调器更新，返回取消监听和重试定时器的函数."""
+        unsub_listener = self._coordinator.async_add_listener(self._handle_coordinator_update)
+
+        @callback
+        def _async_stop():
+            unsub_listener()
+            self._cancel_retry()
+
+        return _async_stop
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._hass.async_create_task(self.async_resolve())
+
+    def _schedule_retry(self):
+        """RETRY_DELAY秒后重新解析，已有定时器时不重复安排."""
+        if self._unsub_retry is None:
+            self._unsub_retry = async_call_later(self._hass, RETRY_DELAY, self._handle_retry)
+
+    def _cancel_retry(self):
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+
+    @callback
+    def _handle_retry(self, _now):
+        self._unsub_retry = None
+        _LOGGER.debug("重新解析失败或被推迟的地址")
+        self._hass.async_create_task(self.async_resolve())
+
+    @property
+    def available(self):
+        """是否有可用的地址来源."""
+        return bool(self._gaode_client.api_key) or self._offline_mode != OFFLINE_GEOCODER_DISABLED
+
+    @property
+    def _use_gaode(self):
+        return bool(self._gaode_client.api_key) and self._offline_mode != OFFLINE_GEOCODER_PRIMARY
+
+    def _has_valid_address(self, imei):
+        state = self._states.get(imei)
+        if imei in self._fallback_imeis:
+            return False
+        return bool(state) and state not in ERROR_STATES and not state.startswith("高德API请求失败")
+
+    def _offline_lookup(self, lat, lon):
+        """离线解析，未启用或超出数据范围时返回None."""
+        if self._offline_mode == OFFLINE_GEOCODER_DISABLED:
+            return None
+        return self._offline_geocoder.lookup(lat, lon)
+
+    def _set_fallback(self, imei, location, state):
+        """高德不可用时优先使用离线结果，否则显示state."""
+        lon, lat = location.wgs84
+        address = self._offline_lookup(lat, lon)
+        if address:
+            self._states[imei] = address
+            self._fallback_imeis.add(imei)
+        else:
+            self._states[imei] = state
+
+    def _mark_failed(self, locations, state):
+        """记录解析失败，RETRY_DELAY秒后或下次更新时重试."""
+        for imei, location in locations.items():
+            self._set_fallback(imei, location, state)
+            self._last_update_time.pop(imei, None)
+            self._last_position.pop(imei, None)
+        self._schedule_retry()
+
+    def _mark_deferred(self, locations, state):
+        """额度不足时保留原有地址，RETRY_DELAY秒后或下次更新时重试."""
+        for imei, location in locations.items():
+            if not self._has_valid_address(imei):
+                self._set_fallback(imei, location, state)
+            self._last_update_time.pop(imei, None)
+            self._last_position.pop(imei, None)
+        self._schedule_retry()
+
+    def _within_threshold(self, imei, lat, lon, accuracy):
+        """判断位移是否小于阈值，GPS漂移时无需重新解析."""
+        last = self._last_position.get(imei)
+        if last is None or not self._has_valid_address(imei):
+            return False
+        threshold = max(self.min_distance, accuracy or 0)
+        distance = haversine(last[0], last[1], lat, lon)
+        if distance < threshold:
+            _LOGGER.debug("设备[%s]位移%.1f米，小于阈值%.1f米，保留原地址", imei, distance, threshold)
+            return True
+        return False
+
+    async def _async_resolve_batch(self, locations, priority):
+        """以一次batch调用解析一组设备的地址，locations为 {imei: LocationFix}."""
+        imeis = list(locations)
+        _LOGGER.debug("本次更新需要解析%d个设备的地址，优先级: %s", len(imeis), priority)
+        # 高德API使用GCJ02坐标系，直接使用定位时已换算好的坐标
+        points = [location.gcj02 for location in locations.values()]
+        try:
+            addresses = await self._gaode_client.async_regeo_batch(points, priority)
+            for imei, address in zip(imeis, addresses):
+                if address:
+                    self._states[imei] = address
+                    self._fallback_imeis.discard(imei)
+                else:
+                    self._set_fallback(imei, locations[imei], "地址解析失败")
+        except GaodeQuotaExceeded as e:
+            _LOGGER.info(f"高德API额度紧张，推迟地址解析: {e}")
+            self._mark_deferred(locations, e.state)
+        except GaodeError as e:
+            _LOGGER.warning(f"地址获取失败: {e}")
+            self._mark_failed(locations, e.state)
+        except Exception as ex:
+            _LOGGER.exception(f"获取地址时发生异常: {ex}")
+            self._mark_failed(locations, "地址获取异常")
+
+    async def async_resolve(self):
+        """解析所有位置发生变化的设备地址."""
+        async with self._lock:
+            data = self._coordinator.data
+            if not isinstance(data, dict):
+                return
+
+            # imei -> LocationFix，按优先级分组
+            pending = {PRIORITY_HIGH: {}, PRIORITY_NORMAL: {}}
+            for imei, device_data in data.items():
+                if not imei:
+                    continue
+                location = device_data.location
+                location_update_time = device_data.location_time
+
+                # 检查位置更新时间是否变化
+                if location_update_time == self._last_update_time.get(imei) and self._states.get(imei):
+                    continue
+
+                # 检查是否有坐标
+                if not (location and self.available):
+                    _LOGGER.warning(f"设备[{device_data.model}]缺少坐标或地址来源，无法获取新地址")
+                    # 如果已有历史地址，保留该地址
+                    if not self._has_valid_address(imei):
+                        self._states[imei] = "等待位置数据"
+                    continue
+
+                lon, lat = location.wgs84
+                if not self._use_gaode:
+                    # 仅使用离线数据，本地解析无需批量请求
+                    self._states[imei] = self._offline_lookup(lat, lon) or "离线数据未覆盖该位置"
+                    self._last_update_time[imei] = location_update_time
+                    continue
+                if self._within_threshold(imei, lat, lon, location.accuracy):
+                    self._last_update_time[imei] = location_update_time
+                    continue
+                # 尚无有效地址的设备优先解析，额度紧张时常规刷新会被推迟
+                priority = PRIORITY_NORMAL if self._has_valid_address(imei) else PRIORITY_HIGH
+                pending[priority][imei] = location
+                self._last_update_time[imei] = location_update_time
+                self._last_position[imei] = (lat, lon)
+
+            for priority, locations in pending.items():
+                if locations:
+                    await self._async_resolve_batch(locations, priority)
+
+        async_dispatcher_send(self._hass, self.signal)
@@ -0,0 +1,144 @@
+"""设备数据模型."""
+from dataclasses import dataclass, fields
+import logging
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_COORDINATE_TYPE_BAIDU,
+    CONF_COORDINATE_TYPE_GOOGLE,
+)
+from .coords import (
+    bd09_to_gcj02,
+    bd09_to_wgs84,
+    gcj02_to_bd09,
+    gcj02_to_wgs84_exact,
+    wgs84_to_gcj02,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _parse_point(info):
+    """从坐标信息中读取(经度, 纬度)，缺失或格式错误时返回None."""
+    if not info:
+        return None
+    try:
+        lon = float(info["longitude"])
+        lat = float(info["latitude"])
+    except (KeyError, TypeError, ValueError):
+        _LOGGER.debug("坐标格式错误: %s", info)
+        return None
+    if not (lon or lat):
+        return None
+    return lon, lat
+
+
+def format_timestamp(timestamp_ms):
+    """毫秒时间戳格式化为本地时间字符串，仅在展示时调用."""
+    if not timestamp_ms:
+        return None
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp_ms / 1000)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@dataclass(frozen=True, slots=True)
+class LocationFix:
+    """一次定位在WGS84、GCJ-02、BD-09下的坐标，均为(经度, 纬度).
+
+    优先使用API返回的坐标，缺失的坐标系只在解析时换算一次.
+    """
+
+    wgs84: tuple
+    gcj02: tuple
+    bd09: tuple
+    accuracy: int = 0
+
+    @classmethod
+    def from_receipt(cls, receipt):
+        """由位置receipt解析，没有任何可用坐标时返回None.
+
+        gpsInfo为WGS84原始坐标，gpsInfoTransformed中google为GCJ-02、baidu为BD-09.
+        """
+        gps_info = receipt.get("gpsInfo") or {}
+        transformed = {
+            item.get("coordinateType"): item
+            for item in receipt.get("gpsInfoTransformed") or []
+        }
+        wgs84 = _parse_point(gps_info)
+        gcj02 = _parse_point(transformed.get(CONF_COORDINATE_TYPE_GOOGLE))
+        bd09 = _parse_point(transformed.get(CONF_COORDINATE_TYPE_BAIDU))
+        if wgs84 is None and gcj02 is None and bd09 is None:
+            return None
+
+        if wgs84 is None:
+            wgs84 = gcj02_to_wgs84_exact(*gcj02) if gcj02 is not None else bd09_to_wgs84(*bd09)
+        if gcj02 is None:
+            gcj02 = bd09_to_gcj02(*bd09) if bd09 is not None else wgs84_to_gcj02(*wgs84)
+        if bd09 is None:
+            bd09 = gcj02_to_bd09(*gcj02)
+
+        accuracy_source = gps_info or next(iter(transformed.values()), {})
+        try:
+            accuracy = int(accuracy_source.get("accuracy") or 0)
+        except (TypeError, ValueError):
+            accuracy = 0
+        return cls(wgs84, gcj02, bd09, accuracy)
+
+    def get(self, coordinate_type):
+        """返回指定坐标系的(经度, 纬度)，未知坐标系时返回WGS84."""
+        if coordinate_type == CONF_COORDINATE_TYPE_GOOGLE:
+            return self.gcj02
+        if coordinate_type == CONF_COORDINATE_TYPE_BAIDU:
+            return self.bd09
+        return self.wgs84
+
+    def as_attributes(self):
+        """返回三种坐标系的坐标，用作实体属性."""
+        return {
+            f"{name}_{axis}": round(value, 6)
+            for name, point in (("wgs84", self.wgs84), ("gcj02", self.gcj02), ("bd09", self.bd09))
+            for axis, value in zip(("longitude", "latitude"), point)
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSnapshot:
+    """一次更新中单个设备的状态，数值字段保持原始类型，展示时再格式化."""
+
+    imei: str
+    model: str
+    version: str
+    power: int | None = None  # 电量（%）
+    status: str | None = None
+    location: LocationFix | None = None
+    latitude: float | None = None  # 按配置的坐标系类型取值
+    longitude: float | None = None
+    accuracy: int | None = None  # 定位精度（米）
+    coordinate_type: str | None = None
+    location_time: int | None = None  # 定位时间，毫秒时间戳
+    phone: str | None = None
+
+
+SNAPSHOT_FIELDS = frozenset(field.name for field in fields(DeviceSnapshot))
+
+
+def diff_snapshots(old, new):
+    """比较两次设备数据，返回 {imei: 发生变化的字段集合}，未变化的设备不出现在结果中.
+
+    新增或移除的设备视为所有字段都发生了变化.
+    """
+    old = old or {}
+    new = new or {}
+    changes = {}
+    for imei in old.keys() | new.keys():
+        before = old.get(imei)
+        after = new.get(imei)
+        if before is after or before == after:
+            continue
+        if before is None or after is None:
+            changes[imei] = SNAPSHOT_FIELDS
+            continue
+        changes[imei] = frozenset(
+            name for name in SNAPSHOT_FIELDS if getattr(before, name) != getattr(after, name)
+        )
+    return changes
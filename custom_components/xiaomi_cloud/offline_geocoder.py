@@ -0,0 +1,119 @@
+"""基于本地行政区/POI数据和KD树的离线逆地理编码."""
+import csv
+import logging
+import math
+import os
+
+from .coords import EARTH_RADIUS, out_of_china
+
+_LOGGER = logging.getLogger(__name__)
+
+BUNDLED_DATASET = os.path.join(os.path.dirname(__file__), "data", "district_centroids.csv")
+DEFAULT_MAX_DISTANCE = 50000  # 超过该距离（米）的最近点视为不在数据覆盖范围内
+
+
+def _to_unit_vector(lat, lon):
+    """经纬度转单位球面上的三维坐标，使欧氏最近邻与球面最近邻一致."""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+class KDTree:
+    """三维静态KD树，只支持最近邻查询."""
+
+    def __init__(self, points):
+        """由[(x, y, z), ...]构建，节点保存点在输入列表中的下标."""
+        self._points = points
+        self._root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        median = len(indices) // 2
+        return (
+            indices[median],
+            axis,
+            self._build(indices[:median], depth + 1),
+            self._build(indices[median + 1:], depth + 1),
+        )
+
+    def nearest(self, target):
+        """返回(最近点下标, 平方欧氏距离)，树为空时返回(None, inf)."""
+        best = [None, math.inf]
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            point = self._points[index]
+            dist = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if dist < best[1]:
+                best[0] = index
+                best[1] = dist
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # 先压远端再压近端，近端先出栈；只有分割面可能更近时才搜索远端
+            if diff * diff < best[1]:
+                stack.append(far)
+            stack.append(near)
+        return best[0], best[1]
+
+
+class OfflineGeocoder:
+    """离线解析省/市/区县.
+
+    数据文件为CSV，每行: 经度,纬度,省,市,区县（WGS84，#开头为注释），
+    解析结果为距离最近的数据点所属的行政区.
+    """
+
+    def __init__(self, records, max_distance=DEFAULT_MAX_DISTANCE):
+        """由[(lat, lon, 地址), ...]构建索引."""
+        self._names = [name for _, _, name in records]
+        self._tree = KDTree([_to_unit_vector(lat, lon) for lat, lon, _ in records])
+        self._max_distance = max_distance
+
+    @classmethod
+    def from_file(cls, path=None, max_distance=DEFAULT_MAX_DISTANCE):
+        """从CSV文件加载（阻塞IO，需在线程池中调用）."""
+        path = path or BUNDLED_DATASET
+        records = []
+        with open(path, encoding="utf-8") as file:
+            for row in csv.reader(file):
+                if not row or row[0].lstrip().startswith("#") or len(row) < 3:
+                    continue
+                try:
+                    lon = float(row[0])
+                    lat = float(row[1])
+                except ValueError:
+                    _LOGGER.debug("跳过无法解析的离线数据行: %s", row)
+                    continue
+                # 相邻层级同名时（如直辖市）只保留一次
+                parts = []
+                for part in (item.strip() for item in row[2:5]):
+                    if part and (not parts or parts[-1] != part):
+                        parts.append(part)
+                if parts:
+                    records.append((lat, lon, "".join(parts)))
+        _LOGGER.info("离线地址数据已加载: %s，共%d条", path, len(records))
+        return cls(records, max_distance)
+
+    def __len__(self):
+        """返回数据点数量."""
+        return len(self._names)
+
+    def lookup(self, lat, lon):
+        """解析WGS84坐标所在的行政区，中国境外或超出数据覆盖范围时返回None."""
+        if out_of_china(lon, lat):
+            return None
+        index, chord_sq = self._tree.nearest(_to_unit_vector(lat, lon))
+        if index is None:
+            return None
+        distance = 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+        if distance > self._max_distance:
+            return None
+        return self._names[index]
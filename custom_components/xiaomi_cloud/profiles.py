@@ -0,0 +1,115 @@
+"""按时段/星期切换基础轮询间隔的轮询配置.
+
+配置为文本，多条规则以分号或换行分隔，每条格式为:
+    HH:MM-HH:MM[@星期]=间隔分钟
+星期为1-7（周一为1），可写成逗号分隔的列表或范围，如 "1-5" 或 "6,7"，省略时每天生效.
+结束时间早于开始时间表示跨越午夜，此时星期按开始的那一天计算；00:00-24:00表示全天.
+例: "07:00-09:30@1-5=1; 17:00-19:30@1-5=1; 23:00-06:00=30; 00:00-24:00@6,7=10"
+多条规则同时命中时使用先写的一条，都不命中时使用位置更新间隔.
+"""
+from dataclasses import dataclass
+import re
+
+_RULE_RE = re.compile(
+    r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*(?:@\s*([\d,\s-]+?))?\s*=\s*(\d+)$"
+)
+ALL_WEEKDAYS = frozenset(range(1, 8))
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class PollingProfile:
+    """一条时段规则，时间为当天的分钟数."""
+
+    start: int
+    end: int  # 全天规则为MINUTES_PER_DAY
+    weekdays: frozenset
+    interval: int  # 分钟
+
+    def matches(self, moment):
+        """判断本地时间moment是否落在该时段内."""
+        minute = moment.hour * 60 + moment.minute
+        weekday = moment.isoweekday()
+        if self.start < self.end:
+            return self.start <= minute < self.end and weekday in self.weekdays
+        # 跨越午夜：午夜之后的部分属于前一天开始的时段
+        if minute >= self.start:
+            return weekday in self.weekdays
+        if minute < self.end:
+            return (weekday - 2) % 7 + 1 in self.weekdays
+        return False
+
+
+def _parse_time(hour, minute):
+    hour = int(hour)
+    minute = int(minute)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        raise ValueError(f"无效的时间: {hour:02d}:{minute:02d}")
+    return hour * 60 + minute
+
+
+def _parse_weekdays(text):
+    if not text:
+        return ALL_WEEKDAYS
+    weekdays = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+        if not 1 <= first <= last <= 7:
+            raise ValueError(f"无效的星期: {part}")
+        weekdays.update(range(first, last + 1))
+    if not weekdays:
+        raise ValueError(f"无效的星期: {text}")
+    return frozenset(weekdays)
+
+
+def parse_profiles(text):
+    """解析轮询配置文本，返回PollingProfile列表，格式错误时抛出ValueError."""
+    profiles = []
+    for rule in re.split(r"[;；\n]", text or ""):
+        rule = rule.strip()
+        if not rule:
+            continue
+        match = _RULE_RE.match(rule)
+        if not match:
+            raise ValueError(f"无法解析的轮询规则: {rule}")
+        start_h, start_m, end_h, end_m, weekdays, interval = match.groups()
+        start = _parse_time(start_h, start_m)
+        end = _parse_time(end_h, end_m)
+        interval = int(interval)
+        # 00:00-24:00为全天规则，其余24:00按次日00:00处理
+        if not (start == 0 and end == MINUTES_PER_DAY):
+            start %= MINUTES_PER_DAY
+            end %= MINUTES_PER_DAY
+            if start == end:
+                raise ValueError(f"开始时间与结束时间相同: {rule}")
+        if interval <= 0:
+            raise ValueError(f"轮询间隔必须大于0: {rule}")
+        profiles.append(PollingProfile(start, end, _parse_weekdays(weekdays), interval))
+    return profiles
+
+
+def active_interval(profiles, moment, default):
+    """返回moment时生效的基础间隔（分钟），没有命中的规则时返回default."""
+    for profile in profiles:
+        if profile.matches(moment):
+            return profile.interval
+    return default
+
+
+def seconds_until_boundary(profiles, moment):
+    """距离下一个规则开始或结束时刻的秒数，没有规则时返回None."""
+    if not profiles:
+        return None
+    elapsed = moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1e6
+    remaining = []
+    for profile in profiles:
+        for minute in (profile.start, profile.end):
+            seconds = (minute * 60 - elapsed) % (MINUTES_PER_DAY * 60)
+            remaining.append(seconds or MINUTES_PER_DAY * 60)
+    return min(remaining)
+
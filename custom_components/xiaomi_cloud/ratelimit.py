@@ -0,0 +1,106 @@
+"""请求限流工具."""
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class TokenBucket:
+    """令牌桶限流器：每秒补充rate个令牌，最多积攒capacity个."""
+
+    def __init__(self, rate, capacity=None):
+        """初始化令牌桶."""
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now_ts = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now_ts - self._updated) * self.rate)
+        self._updated = now_ts
+
+    @property
+    def tokens(self):
+        """当前可用令牌数."""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens=1):
+        """立即获取令牌，不足时返回False."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens=1):
+        """获取令牌，不足时按先后顺序等待."""
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class PriorityTokenBucket(TokenBucket):
+    """带优先级队列的令牌桶.
+
+    令牌不足时请求按(priority, 先后顺序)排队，priority越小越先获得令牌；
+    reserve个令牌只留给priority为0的请求，低优先级请求不会把桶取空.
+    """
+
+    def __init__(self, rate, capacity=None, reserve=0):
+        """初始化令牌桶，reserve不超过capacity-1."""
+        super().__init__(rate, capacity)
+        self.reserve = min(float(reserve), self.capacity - 1)
+        self._waiters = []  # (priority, 序号, tokens, future)
+        self._sequence = itertools.count()
+        self._wakeup = None
+
+    def _needed(self, tokens, priority):
+        return tokens + (self.reserve if priority > 0 else 0)
+
+    @property
+    def queued(self):
+        """正在排队的请求数."""
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, tokens=1, priority=0):
+        """获取令牌，不足时按优先级排队等待."""
+        self._discard_done()
+        if not self._waiters and self._try_take(tokens, priority):
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        # 取消的等待者留在堆中，分配令牌时跳过
+        await future
+
+    def _try_take(self, tokens, priority):
+        self._refill()
+        if self._tokens >= self._needed(tokens, priority):
+            self._tokens -= tokens
+            return True
+        return False
+
+    def _discard_done(self):
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+
+    def _dispatch(self):
+        """按优先级唤醒等待者，令牌不足时在预计补足的时间再次分配."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._discard_done()
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if not self._try_take(tokens, priority):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+            self._discard_done()
+        if self._waiters:
+            priority, _, tokens, _ = self._waiters[0]
+            delay = max(0.0, (self._needed(tokens, priority) - self._tokens) / self.rate)
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
@@ -0,0 +1,284 @@
+"""小米云请求层：按接口重试（指数退避+随机抖动），按主机熔断."""
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+import logging
+import random
+import time
+from urllib import parse
+
+import aiohttp
+import async_timeout
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# 服务端错误和限流时重试，其余状态码（包括401登录失效）直接返回给调用方
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+BREAKER_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断
+BREAKER_RESET_TIMEOUT = 30  # 熔断多少秒后放行一次探测请求
+BREAKER_MAX_RESET_TIMEOUT = 600  # 探测失败时熔断时间翻倍，最长10分钟
+BREAKER_HISTORY = 20  # 诊断信息中保留的状态变化条数
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """单个接口的重试策略，attempts为包括首次请求在内的总次数."""
+
+    attempts: int = 1
+    base_delay: float = 1.0  # 秒
+    max_delay: float = 10.0
+    timeout: float = 15.0
+
+    def backoff(self, retry):
+        """第retry次重试（从0开始）前等待的秒数，full jitter避免多个请求同时重试."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+RETRY_POLICIES = {
+    "sign": RetryPolicy(attempts=3),
+    "login": RetryPolicy(attempts=2),
+    "service_token": RetryPolicy(attempts=2),
+    "device_list": RetryPolicy(attempts=3),
+    "device_status": RetryPolicy(attempts=2, base_delay=0.5, max_delay=4),
+    "find": RetryPolicy(attempts=2, base_delay=0.5, max_delay=4),
+    # 提示音、丢失模式等命令可能已经执行只是响应丢失，不重试以免重复执行
+    "command": RetryPolicy(),
+}
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+# 限流队列的优先级，数值越小越先获得令牌
+LANE_COMMAND = 0  # 用户触发的命令和定位，可以使用预留令牌
+LANE_LOGIN = 1  # 登录，轮询依赖登录结果
+LANE_POLL = 2  # 后台定时轮询
+ENDPOINT_LANES = {
+    "sign": LANE_LOGIN,
+    "login": LANE_LOGIN,
+    "service_token": LANE_LOGIN,
+    "command": LANE_COMMAND,
+}
+
+
+class CircuitOpenError(Exception):
+    """目标主机处于熔断状态，请求没有发出."""
+
+    def __init__(self, host, retry_after):
+        """记录主机和剩余熔断时间（秒）."""
+        super().__init__(f"{host}熔断中，{retry_after:.0f}秒后重试")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """单个主机的熔断器.
+
+    closed时正常放行；连续失败达到阈值后转为open，直接拒绝请求；
+    熔断时间到期后转为half_open，只放行一个探测请求：成功则恢复closed，
+    失败则以翻倍的熔断时间重新open.
+    """
+
+    def __init__(self, host, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=BREAKER_RESET_TIMEOUT):
+        """初始化熔断器."""
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0  # 连续失败次数
+        self._open_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+        self.history = deque(maxlen=BREAKER_HISTORY)
+
+    def retry_after(self, now=None):
+        """距离允许探测还有多少秒，未熔断时为0."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._opened_at + self._open_timeout - now)
+
+    def available(self, now=None):
+        """当前是否允许发送请求，不占用探测名额."""
+        if self.state == STATE_OPEN and self.retry_after(now) <= 0:
+            self._transition(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN:
+            return not self._probing
+        return self.state == STATE_CLOSED
+
+    def acquire(self, now=None):
+        """发送请求前调用，不允许时抛出CircuitOpenError."""
+        if not self.available(now):
+            raise CircuitOpenError(self.host, self.retry_after(now))
+        if self.state == STATE_HALF_OPEN:
+            self._probing = True
+
+    def release(self):
+        """请求被取消、没有结果时归还探测名额."""
+        self._probing = False
+
+    def record_success(self):
+        """记录一次成功，熔断中或探测中时恢复正常."""
+        self.failures = 0
+        self._probing = False
+        if self.state != STATE_CLOSED:
+            self._open_timeout = self.reset_timeout
+            self._transition(STATE_CLOSED)
+
+    def record_failure(self, now=None):
+        """记录一次失败，达到阈值或探测失败时熔断."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._probing = False
+            self._open_timeout = min(self._open_timeout * 2, BREAKER_MAX_RESET_TIMEOUT)
+            self._open(now)
+        elif self.state == STATE_CLOSED and self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now):
+        self._opened_at = time.monotonic() if now is None else now
+        self._transition(STATE_OPEN)
+
+    def _transition(self, state):
+        if state == STATE_OPEN:
+            _LOGGER.warning("%s连续失败%d次，熔断%d秒", self.host, self.failures, self._open_timeout)
+        elif state == STATE_HALF_OPEN:
+            _LOGGER.info("%s熔断到期，发送探测请求", self.host)
+        else:
+            _LOGGER.info("%s已恢复正常", self.host)
+        self.history.append({
+            "time": dt_util.utcnow().isoformat(),
+            "from": self.state,
+            "to": state,
+            "failures": self.failures,
+        })
+        self.state = state
+
+    def as_dict(self):
+        """诊断信息."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1),
+            "open_timeout": self._open_timeout,
+            "history": list(self.history),
+        }
+
+
+class XiaomiRequester:
+    """小米云接口共用的请求层，按URL主机共享熔断器，按接口名选择重试策略.
+
+    配置limiter（PriorityTokenBucket）时每次尝试（包括重试）都先获取令牌，
+    同一账号的所有请求共享一个令牌桶.
+    """
+
+    def __init__(self, policies=None, limiter=None):
+        """初始化请求层，policies为 {接口名: RetryPolicy}."""
+        self._policies = RETRY_POLICIES if policies is None else policies
+        self.limiter = limiter
+        self._breakers = {}
+        self._stats = {}  # 接口名 -> 请求计数
+
+    def breaker(self, host):
+        """返回主机的熔断器，首次使用时创建."""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    def available(self, host):
+        """主机当前是否允许发送请求."""
+        return self.breaker(host).available()
+
+    def retry_after(self, host):
+        """主机剩余的熔断时间（秒）."""
+        return self.breaker(host).retry_after()
+
+    def _endpoint_stats(self, endpoint):
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+        return stats
+
+    async def request(self, session, method, url, endpoint, lane=None, **kwargs):
+        """发送请求并读取完整响应体，失败时按endpoint的策略重试.
+
+        lane为限流优先级，默认按endpoint取ENDPOINT_LANES，未列出的接口视为后台轮询.
+        返回的ClientResponse已读取响应体，调用方仍可使用status、cookies、history、text()等；
+        重试用尽时返回最后一次响应，或抛出最后一次的超时/连接异常；熔断时抛出CircuitOpenError.
+        """
+        policy = self._policies.get(endpoint, DEFAULT_RETRY_POLICY)
+        if lane is None:
+            lane = ENDPOINT_LANES.get(endpoint, LANE_POLL)
+        breaker = self.breaker(parse.urlsplit(url).hostname)
+        stats = self._endpoint_stats(endpoint)
+        response = None
+        error = None
+        for attempt in range(policy.attempts):
+            if attempt:
+                delay = policy.backoff(attempt - 1)
+                if response is not None and response.status == 429:
+                    delay = min(policy.max_delay, max(delay, _retry_after_header(response)))
+                stats["retries"] += 1
+                _LOGGER.debug("%s请求失败，%.1f秒后第%d次重试", endpoint, delay, attempt)
+                await asyncio.sleep(delay)
+            if self.limiter is not None:
+                await self.limiter.acquire(priority=lane)
+            try:
+                breaker.acquire()
+            except CircuitOpenError:
+                stats["rejected"] += 1
+                raise
+            stats["requests"] += 1
+            try:
+                async with async_timeout.timeout(policy.timeout):
+                    response = await session.request(method, url, **kwargs)
+                    await response.read()
+            except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+                breaker.record_failure()
+                response = None
+                error = err
+                _LOGGER.debug("%s请求出错: %r", endpoint, err)
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            if response.status in RETRY_STATUSES:
+                breaker.record_failure()
+                _LOGGER.debug("%s请求返回HTTP %s", endpoint, response.status)
+                continue
+            breaker.record_success()
+            return response
+
+        stats["failures"] += 1
+        if response is not None:
+            return response
+        raise error
+
+    def as_dict(self):
+        """诊断信息：各主机的熔断状态和各接口的请求计数."""
+        diagnostics = {
+            "breakers": {host: breaker.as_dict() for host, breaker in self._breakers.items()},
+            "endpoints": {endpoint: dict(stats) for endpoint, stats in self._stats.items()},
+        }
+        if self.limiter is not None:
+            diagnostics["rate_limit"] = {
+                "rate": self.limiter.rate,
+                "capacity": self.limiter.capacity,
+                "reserve": self.limiter.reserve,
+                "tokens": round(self.limiter.tokens, 2),
+                "queued": self.limiter.queued,
+            }
+        return diagnostics
+
+
+def _retry_after_header(response):
+    """读取429响应的Retry-After秒数，无法解析时返回0."""
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,165 @@
+"""按设备调度位置轮询：移动时缩短间隔，静止时指数退避."""
+import heapq
+import logging
+import time
+
+from .coords import haversine
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_POLL_INTERVAL = 60  # 最短轮询间隔（秒）
+STATIONARY_BACKOFF = 2  # 静止时每次间隔放大的倍数
+STATIONARY_MAX_FACTOR = 4  # 静止时间隔最多放大到基础间隔的倍数
+MOTION_MIN_DISTANCE = 100  # 位移超过该距离（米）且超过定位精度时视为移动
+TARGET_DISPLACEMENT = 500  # 移动时希望两次轮询之间的位移（米）
+DUE_SLACK = 5  # 截止时间在该秒数内的设备一并轮询，合并相近的截止时间
+
+
+class _DeviceSchedule:
+    """单个设备的调度状态."""
+
+    __slots__ = ("interval", "deadline", "position", "fix_time", "low_battery")
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.deadline = 0.0
+        self.position = None  # 上次定位的WGS84 (lat, lon)
+        self.fix_time = None  # 上次定位时间，毫秒时间戳
+        self.low_battery = False
+
+
+class PollScheduler:
+    """以最小堆保存每个IMEI的下次轮询截止时间（time.monotonic）.
+
+    每次轮询后根据两次定位之间的位移估算速度：移动时间隔按
+    TARGET_DISPLACEMENT / 速度缩短，静止时按STATIONARY_BACKOFF倍数放大；
+    启用低电量轮询时，电量低于阈值的设备固定按low_battery_interval轮询.
+    """
+
+    def __init__(self, base_interval, low_battery_threshold=None, low_battery_interval=None):
+        """初始化调度器，间隔单位均为秒，low_battery_threshold为None时不启用低电量轮询."""
+        self.base_interval = max(MIN_POLL_INTERVAL, base_interval)
+        self.low_battery_threshold = low_battery_threshold
+        self.low_battery_interval = low_battery_interval
+        self._devices = {}
+        self._heap = []  # (deadline, imei)，过期条目在取堆顶时丢弃
+
+    @property
+    def max_interval(self):
+        """静止设备的最长轮询间隔."""
+        return self.base_interval * STATIONARY_MAX_FACTOR
+
+    def due(self, imeis, now=None):
+        """返回imeis中已到期或尚未调度过的设备."""
+        now = time.monotonic() if now is None else now
+        return [
+            imei for imei in imeis
+            if imei not in self._devices or self._devices[imei].deadline <= now + DUE_SLACK
+        ]
+
+    def next_deadline(self):
+        """返回最早的截止时间，没有设备时返回None.
+
+        已移除的设备和被重新调度覆盖的旧条目在这里丢弃.
+        """
+        while self._heap:
+            deadline, imei = self._heap[0]
+            state = self._devices.get(imei)
+            if state is None or state.deadline != deadline:
+                heapq.heappop(self._heap)
+                continue
+            return deadline
+        return None
+
+    def seconds_until_next(self, now=None):
+        """距离下次需要轮询的秒数，至少DUE_SLACK秒以免空转."""
+        now = time.monotonic() if now is None else now
+        deadline = self.next_deadline()
+        if deadline is None:
+            return self.base_interval
+        return max(DUE_SLACK, deadline - now)
+
+    def record(self, imei, snapshot, now=None):
+        """记录一次轮询结果并安排该设备的下次轮询."""
+        now = time.monotonic() if now is None else now
+        state = self._devices.get(imei)
+        if state is None:
+            state = self._devices[imei] = _DeviceSchedule(self.base_interval)
+        else:
+            state.interval = self._next_interval(state, snapshot)
+
+        location = snapshot.location if snapshot is not None else None
+        if location is not None and snapshot.location_time:
+            lon, lat = location.wgs84
+            state.position = (lat, lon)
+            state.fix_time = snapshot.location_time
+
+        interval = state.interval
+        low_battery = (
+            self.low_battery_threshold is not None
+            and snapshot is not None
+            and snapshot.power is not None
+            and snapshot.power < self.low_battery_threshold
+        )
+        if low_battery != state.low_battery:
+            state.low_battery = low_battery
+            if low_battery:
+                _LOGGER.info("检测到设备 [%s] 电量低于 %s%%，切换到低电量更新模式 (%s分钟)",
+                             snapshot.model, self.low_battery_threshold, self.low_battery_interval // 60)
+            else:
+                _LOGGER.info("设备 [%s] 电量恢复正常，恢复自适应更新间隔", imei)
+        if low_battery:
+            # 与原低电量模式一致，直接使用低电量间隔；自适应间隔保留，电量恢复后继续使用
+            interval = self.low_battery_interval
+
+        self._schedule(imei, state, now + interval)
+        _LOGGER.debug("设备[%s]下次轮询在%.0f秒后", imei, interval)
+
+    def _next_interval(self, state, snapshot):
+        """根据两次定位之间的位移计算新的轮询间隔."""
+        location = snapshot.location if snapshot is not None else None
+        if (location is None or state.position is None or not snapshot.location_time
+                or snapshot.location_time <= state.fix_time):
+            # 没有新定位，无法判断是否移动，保持原间隔
+            return state.interval
+
+        lon, lat = location.wgs84
+        distance = haversine(state.position[0], state.position[1], lat, lon)
+        elapsed = (snapshot.location_time - state.fix_time) / 1000
+        if distance > max(MOTION_MIN_DISTANCE, snapshot.accuracy or 0) and elapsed > 0:
+            speed = distance / elapsed
+            return min(self.base_interval, max(MIN_POLL_INTERVAL, TARGET_DISPLACEMENT / speed))
+        return min(self.max_interval, state.interval * STATIONARY_BACKOFF)
+
+    def _schedule(self, imei, state, deadline):
+        state.deadline = deadline
+        heapq.heappush(self._heap, (deadline, imei))
+
+    def set_base_interval(self, base_interval, now=None):
+        """修改基础间隔，所有设备从新间隔重新开始自适应."""
+        now = time.monotonic() if now is None else now
+        self.base_interval = max(MIN_POLL_INTERVAL, base_interval)
+        for imei, state in self._devices.items():
+            state.interval = self.base_interval
+            self._schedule(imei, state, min(state.deadline, now + self.base_interval))
+
+    def set_low_battery(self, threshold, interval, now=None):
+        """修改低电量设置，threshold为None时关闭，已处于低电量的设备按新间隔重新调度."""
+        now = time.monotonic() if now is None else now
+        self.low_battery_threshold = threshold
+        self.low_battery_interval = interval
+        for imei, state in self._devices.items():
+            if threshold is None:
+                state.low_battery = False
+            elif state.low_battery:
+                self._schedule(imei, state, now + interval)
+
+    def remove(self, imei):
+        """移除设备，其堆条目在下次取堆顶时丢弃."""
+        self._devices.pop(imei, None)
+
+    def retain(self, imeis):
+        """只保留imeis中的设备，移除账号下已不存在的设备."""
+        for imei in self._devices.keys() - set(imeis):
+            _LOGGER.debug("设备[%s]已不在账号下，停止调度", imei)
+            self.remove(imei)
@@ -0,0 +1,68 @@
+"""小米云登录会话的加密持久化存储."""
+import base64
+import hashlib
+import json
+import logging
+
+from cryptography.fernet import Fernet, InvalidToken
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.session"
+
+# 密钥派生参数，修改会使已保存的会话全部失效
+_KDF_ITERATIONS = 100_000
+
+
+class XiaomiSessionStore:
+    """按配置入口保存serviceToken、userId、cookies和设备列表.
+
+    内容以账号密码派生的密钥加密后写入 .storage，
+    密码变更后旧会话无法解密，会被视为不存在.
+    """
+
+    def __init__(self, hass, entry_id, username, password):
+        """初始化会话存储."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}", private=True)
+        self._salt = f"{DOMAIN}:{entry_id}:{username}".encode("utf-8")
+        self._password = password
+        self._fernet = None
+
+    def _derive_fernet(self):
+        """由密码派生加密密钥（耗时操作，在线程池中执行）."""
+        key = hashlib.pbkdf2_hmac("sha256", self._password.encode("utf-8"), self._salt, _KDF_ITERATIONS)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    async def _async_get_fernet(self):
+        """获取加密器，首次调用时派生密钥."""
+        if self._fernet is None:
+            self._fernet = await self._hass.async_add_executor_job(self._derive_fernet)
+        return self._fernet
+
+    async def async_load(self):
+        """读取并解密会话，不存在或无法解密时返回None."""
+        stored = await self._store.async_load()
+        if not stored or "token" not in stored:
+            return None
+        fernet = await self._async_get_fernet()
+        try:
+            payload = fernet.decrypt(stored["token"].encode("ascii"))
+            return json.loads(payload)
+        except (InvalidToken, ValueError) as e:
+            _LOGGER.warning("已保存的小米云会话无法解密，将重新登录: %s", str(e))
+            return None
+
+    async def async_save(self, session_data):
+        """加密并保存会话."""
+        fernet = await self._async_get_fernet()
+        payload = json.dumps(session_data, ensure_ascii=False).encode("utf-8")
+        await self._store.async_save({"token": fernet.encrypt(payload).decode("ascii")})
+
+    async def async_remove(self):
+        """删除已保存的会话."""
+        await self._store.async_remove()
@@ -0,0 +1,18 @@
+"""测试公共工具."""
+import importlib
+import pathlib
+import sys
+import types
+
+COMPONENT_DIR = pathlib.Path(__file__).parents[1] / "custom_components" / "xiaomi_cloud"
+# 集成的__init__依赖Home Assistant，这里以独立的包名加载各模块，不执行__init__
+_PACKAGE = "xiaomi_cloud_under_test"
+
+
+def load_component_module(name):
+    """加载集成中的模块，模块内的相对导入从同一目录加载."""
+    if _PACKAGE not in sys.modules:
+        package = types.ModuleType(_PACKAGE)
+        package.__path__ = [str(COMPONENT_DIR)]
+        sys.modules[_PACKAGE] = package
+    return importlib.import_module(f"{_PACKAGE}.{name}")
@@ -0,0 +1,45 @@
+"""协调器按设备调度刷新的测试，需要pytest-homeassistant-custom-component."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.xiaomi_cloud.DataUpdateCoordinator import (  # noqa: E402
+    XiaomiCloudDataUpdateCoordinator,
+)
+from custom_components.xiaomi_cloud.models import DeviceSnapshot  # noqa: E402
+
+IMEIS = ["imei-1", "imei-2", "imei-3"]
+
+
+def _snapshots(session, imeis):
+    return {imei: DeviceSnapshot(imei, "phone", "1.0") for imei in imeis}
+
+
+@pytest.mark.asyncio
+async def test_forced_refresh_locates_every_device(hass):
+    with patch.object(XiaomiCloudDataUpdateCoordinator, "_schedule_initial_refresh", AsyncMock()):
+        coordinator = XiaomiCloudDataUpdateCoordinator(hass, "user", "password", 10, "original")
+    coordinator._session_restored = True
+    coordinator.login_result = True
+    coordinator._device_info = [{"imei": imei, "model": "phone"} for imei in IMEIS]
+    coordinator._fix_freshness = 0
+    locate = AsyncMock(side_effect=_snapshots)
+
+    with patch.object(coordinator, "_locate_devices", locate):
+        # 首次刷新时所有设备都未调度过
+        await coordinator.async_refresh()
+        assert locate.await_args.args[1] == IMEIS
+
+        # 没有到期的设备时普通刷新不唤醒手机
+        locate.reset_mock()
+        await coordinator.async_refresh()
+        locate.assert_not_awaited()
+
+        # 不指定imei的find服务刷新所有设备
+        await coordinator._send_command({"service": "find", "data": {"imei": None}})
+        assert locate.await_args.args[1] == IMEIS
+        assert set(coordinator.data) == set(IMEIS)
+
+    await coordinator.async_close()
@@ -0,0 +1,64 @@
+"""坐标系转换测试."""
+import pytest
+
+from conftest import load_component_module
+
+coords = load_component_module("coords")
+
+# (经度, 纬度)
+BEIJING = (116.391, 39.907)
+SHANGHAI = (121.473, 31.230)
+URUMQI = (87.617, 43.793)
+SANYA = (109.512, 18.252)
+TOKYO = (139.692, 35.690)
+SEOUL = (126.978, 37.566)
+TAIPEI = (121.565, 25.033)
+HANOI = (105.834, 21.028)
+LONDON = (-0.128, 51.507)
+
+
+@pytest.mark.parametrize("point", [BEIJING, SHANGHAI, URUMQI, SANYA])
+def test_in_china(point):
+    assert not coords.out_of_china(*point)
+
+
+@pytest.mark.parametrize("point", [TOKYO, SEOUL, TAIPEI, HANOI, LONDON])
+def test_out_of_china(point):
+    assert coords.out_of_china(*point)
+
+
+@pytest.mark.parametrize("point", [TOKYO, TAIPEI, LONDON])
+def test_no_offset_outside_china(point):
+    assert coords.wgs84_to_gcj02(*point) == point
+    assert coords.gcj02_to_wgs84_exact(*point) == point
+
+
+@pytest.mark.parametrize("point", [BEIJING, SHANGHAI, URUMQI, SANYA])
+def test_gcj02_round_trip(point):
+    gcj = coords.wgs84_to_gcj02(*point)
+    # GCJ-02偏移在数百米量级
+    assert 100 < coords.haversine(point[1], point[0], gcj[1], gcj[0]) < 1000
+    lon, lat = coords.gcj02_to_wgs84_exact(*gcj)
+    assert lon == pytest.approx(point[0], abs=1e-6)
+    assert lat == pytest.approx(point[1], abs=1e-6)
+
+
+def test_exact_inverse_beats_single_step():
+    gcj = coords.wgs84_to_gcj02(*BEIJING)
+    approx = coords.gcj02_to_wgs84(*gcj)
+    exact = coords.gcj02_to_wgs84_exact(*gcj)
+    assert (coords.haversine(BEIJING[1], BEIJING[0], exact[1], exact[0])
+            < coords.haversine(BEIJING[1], BEIJING[0], approx[1], approx[0]))
+
+
+@pytest.mark.parametrize("point", [BEIJING, SHANGHAI])
+def test_bd09_round_trip(point):
+    lon, lat = coords.bd09_to_wgs84(*coords.wgs84_to_bd09(*point))
+    assert lon == pytest.approx(point[0], abs=1e-5)
+    assert lat == pytest.approx(point[1], abs=1e-5)
+
+
+def test_haversine():
+    # 纬度相差1度约111.2公里
+    assert coords.haversine(30, 120, 31, 120) == pytest.approx(111195, rel=1e-3)
+    assert coords.haversine(30, 120, 30, 120) == 0
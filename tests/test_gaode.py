@@ -0,0 +1,56 @@
+"""高德API每日额度测试."""
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from conftest import load_component_module  # noqa: E402
+
+gaode = load_component_module("gaode")
+
+LIMIT = 100
+
+
+@pytest.fixture
+def day(monkeypatch):
+    """可修改的当前日期，额度计数不写入 .storage."""
+    current = ["2026-10-17"]
+    monkeypatch.setattr(gaode, "Store", MagicMock())
+    monkeypatch.setattr(gaode.GaodeQuota, "_today", staticmethod(lambda: current[0]))
+    return current
+
+
+def test_reserve_only_allows_high_priority(day):
+    quota = gaode.GaodeQuota(None, "entry", LIMIT)
+    quota.record(LIMIT - int(LIMIT * gaode.QUOTA_RESERVE_RATIO) - 1)
+    assert quota.allows(gaode.PRIORITY_NORMAL)
+
+    quota.record()
+    assert quota.remaining == LIMIT * gaode.QUOTA_RESERVE_RATIO
+    assert not quota.allows(gaode.PRIORITY_NORMAL)
+    assert quota.allows(gaode.PRIORITY_HIGH)
+
+    quota.record(quota.remaining)
+    assert quota.remaining == 0
+    assert not quota.allows(gaode.PRIORITY_HIGH)
+
+
+def test_day_rollover_resets_usage(day):
+    quota = gaode.GaodeQuota(None, "entry", LIMIT)
+    quota.exhaust()
+    assert quota.used == LIMIT
+    assert not quota.allows(gaode.PRIORITY_HIGH)
+
+    day[0] = "2026-10-18"
+    assert quota.used == 0
+    assert quota.remaining == LIMIT
+    assert quota.allows(gaode.PRIORITY_NORMAL)
+
+
+def test_record_after_rollover_counts_new_day(day):
+    quota = gaode.GaodeQuota(None, "entry", LIMIT)
+    quota.record(30)
+    day[0] = "2026-10-18"
+    quota.record(5)
+    assert quota.used == 5
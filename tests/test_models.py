@@ -0,0 +1,38 @@
+"""设备数据模型测试."""
+import dataclasses
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from conftest import load_component_module  # noqa: E402
+
+models = load_component_module("models")
+
+PHONE = models.DeviceSnapshot("imei-1", "phone", "1.0", power=80, status="online",
+                              latitude=31.3, longitude=120.6, location_time=1760000000000)
+WATCH = models.DeviceSnapshot("imei-2", "watch", "2.0", power=50)
+
+
+def test_unchanged_devices_are_omitted():
+    assert models.diff_snapshots({"imei-1": PHONE}, {"imei-1": PHONE}) == {}
+    # 内容相同的新对象也视为未变化
+    assert models.diff_snapshots({"imei-1": PHONE}, {"imei-1": dataclasses.replace(PHONE)}) == {}
+
+
+def test_changed_fields():
+    moved = dataclasses.replace(PHONE, latitude=31.4, location_time=1760000060000)
+    changes = models.diff_snapshots({"imei-1": PHONE, "imei-2": WATCH},
+                                    {"imei-1": moved, "imei-2": WATCH})
+    assert changes == {"imei-1": frozenset({"latitude", "location_time"})}
+
+
+def test_added_and_removed_devices_change_every_field():
+    changes = models.diff_snapshots({"imei-1": PHONE}, {"imei-2": WATCH})
+    assert changes == {"imei-1": models.SNAPSHOT_FIELDS, "imei-2": models.SNAPSHOT_FIELDS}
+
+
+def test_empty_data():
+    assert models.diff_snapshots(None, {"imei-1": PHONE}) == {"imei-1": models.SNAPSHOT_FIELDS}
+    assert models.diff_snapshots({"imei-1": PHONE}, None) == {"imei-1": models.SNAPSHOT_FIELDS}
+    assert models.diff_snapshots(None, None) == {}
@@ -0,0 +1,47 @@
+"""轮询时段规则解析测试."""
+import datetime
+
+import pytest
+
+from conftest import load_component_module
+
+profiles = load_component_module("profiles")
+
+SATURDAY = datetime.datetime(2026, 10, 17)
+MONDAY = datetime.datetime(2026, 10, 19)
+
+
+def test_full_day_rule():
+    rules = profiles.parse_profiles("00:00-24:00@6,7=10")
+    assert rules == [profiles.PollingProfile(0, profiles.MINUTES_PER_DAY, frozenset({6, 7}), 10)]
+    for hour, minute in ((0, 0), (12, 30), (23, 59)):
+        assert profiles.active_interval(rules, SATURDAY.replace(hour=hour, minute=minute), 3) == 10
+        assert profiles.active_interval(rules, MONDAY.replace(hour=hour, minute=minute), 3) == 3
+
+
+def test_overnight_rule_uses_start_weekday():
+    rules = profiles.parse_profiles("23:00-06:00@5=30")
+    friday_night = datetime.datetime(2026, 10, 16, 23, 30)
+    assert profiles.active_interval(rules, friday_night, 3) == 30
+    assert profiles.active_interval(rules, SATURDAY.replace(hour=2), 3) == 30
+    assert profiles.active_interval(rules, SATURDAY.replace(hour=23, minute=30), 3) == 3
+
+
+def test_end_at_midnight():
+    rules = profiles.parse_profiles("22:00-24:00=15")
+    assert rules[0].end == 0
+    assert profiles.active_interval(rules, MONDAY.replace(hour=23), 3) == 15
+    assert profiles.active_interval(rules, MONDAY.replace(hour=1), 3) == 3
+
+
+@pytest.mark.parametrize("text", [
+    "07:00-07:00=1",
+    "24:00-24:00=1",
+    "07:00-08:00@0-2=1",
+    "25:00-01:00=2",
+    "07:00-08:00=0",
+    "7-9=1",
+])
+def test_invalid_rules(text):
+    with pytest.raises(ValueError):
+        profiles.parse_profiles(text)
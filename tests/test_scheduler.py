@@ -0,0 +1,91 @@
+"""按设备调度轮询的测试."""
+from types import SimpleNamespace
+
+from conftest import load_component_module
+
+scheduler = load_component_module("scheduler")
+PollScheduler = scheduler.PollScheduler
+
+BASE = 600
+ORIGIN = (120.585, 31.299)  # (经度, 纬度)
+EPOCH = 1760000000  # 定位时间的起点（秒）
+
+
+def _snapshot(fix_time, lon=ORIGIN[0], lat=ORIGIN[1], power=80):
+    """调度器只读取这些字段，fix_time为相对EPOCH的秒数."""
+    return SimpleNamespace(
+        model="phone",
+        power=power,
+        accuracy=10,
+        location=SimpleNamespace(wgs84=(lon, lat)),
+        location_time=int((EPOCH + fix_time) * 1000),
+    )
+
+
+def test_unscheduled_devices_are_due():
+    poll = PollScheduler(BASE)
+    assert poll.due(["a", "b"], now=0) == ["a", "b"]
+    assert poll.next_deadline() is None
+    assert poll.seconds_until_next(now=0) == BASE
+
+
+def test_record_schedules_base_interval():
+    poll = PollScheduler(BASE)
+    poll.record("a", _snapshot(0), now=0)
+    assert poll.due(["a", "b"], now=0) == ["b"]
+    assert poll.seconds_until_next(now=0) == BASE
+    # 截止时间在DUE_SLACK秒内的设备一并轮询
+    assert poll.due(["a"], now=BASE - scheduler.DUE_SLACK - 1) == []
+    assert poll.due(["a"], now=BASE - scheduler.DUE_SLACK) == ["a"]
+
+
+def test_failed_poll_keeps_interval():
+    poll = PollScheduler(BASE)
+    poll.record("a", None, now=0)
+    poll.record("a", None, now=BASE)
+    assert poll.seconds_until_next(now=BASE) == BASE
+
+
+def test_moving_device_polls_sooner():
+    poll = PollScheduler(BASE)
+    poll.record("a", _snapshot(0), now=0)
+    # 60秒内移动约1公里，间隔缩短到最短轮询间隔
+    poll.record("a", _snapshot(60, lat=ORIGIN[1] + 0.009), now=BASE)
+    assert poll.seconds_until_next(now=BASE) == scheduler.MIN_POLL_INTERVAL
+
+
+def test_stationary_device_backs_off_to_max():
+    poll = PollScheduler(BASE)
+    poll.record("a", _snapshot(0), now=0)
+    intervals = []
+    for step in range(1, 4):
+        now = step * 10000
+        poll.record("a", _snapshot(now), now=now)
+        intervals.append(poll.seconds_until_next(now=now))
+    assert intervals == [BASE * 2, BASE * 4, poll.max_interval]
+    assert poll.max_interval == BASE * scheduler.STATIONARY_MAX_FACTOR
+
+
+def test_low_battery_uses_low_battery_interval():
+    poll = PollScheduler(BASE, low_battery_threshold=20, low_battery_interval=300)
+    poll.record("a", _snapshot(0, power=10), now=0)
+    assert poll.seconds_until_next(now=0) == 300
+    # 电量恢复后继续使用自适应间隔
+    poll.record("a", _snapshot(1000, power=50), now=300)
+    assert poll.seconds_until_next(now=300) == BASE * 2
+
+
+def test_set_low_battery_reschedules_low_battery_devices():
+    poll = PollScheduler(BASE, low_battery_threshold=20, low_battery_interval=300)
+    poll.record("a", _snapshot(0, power=10), now=0)
+    poll.set_low_battery(20, 120, now=60)
+    assert poll.seconds_until_next(now=60) == 120
+
+
+def test_retain_drops_removed_devices():
+    poll = PollScheduler(BASE)
+    poll.record("a", _snapshot(0), now=0)
+    poll.record("b", _snapshot(0), now=100)
+    poll.retain(["b"])
+    assert poll.next_deadline() == 100 + BASE
+    assert poll.due(["b"], now=0) == []